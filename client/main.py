@@ -13,16 +13,80 @@
 #
 
 import requests
-import json
 
-import uuid
+try:
+    import orjson
+except ImportError:  # orjson not installed, fall back to stdlib json
+    orjson = None
+    import json
+
+try:
+    import pybase64 as base64  # SIMD-accelerated, same API as base64
+except ImportError:  # pybase64 not installed, fall back to stdlib base64
+    import base64
+
+import atexit
+import secrets
+import os
+import stat
 import pathlib
 import logging
 import sys
-import base64
 import time
+import random
+import threading
 
 from configparser import ConfigParser
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+
+
+############################################################
+#
+# HTTP session
+#
+# A single session is shared by all web service calls so the
+# underlying connections (and TLS sessions) are kept alive and
+# reused instead of re-established on every command. Retries
+# are handled by web_service_req, so the adapter does none.
+#
+SESSION = requests.Session()
+
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=0)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+atexit.register(SESSION.close)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# session methods for the body-less HTTP verbs; POST is handled
+# separately by web_service_req since it sends a body
+VERBS = {"GET": SESSION.get, "DELETE": SESSION.delete}
+
+# status codes that are valid responses from the web service and
+# so are not retried by web_service_req
+FINAL_STATUS_CODES = frozenset({200, 400, 404, 481, 482, 500})
+
+
+############################################################
+#
+# valid graph and analysis types
+#
+GRAPH_TYPES = frozenset(
+    {"any", "connected", "complete", "acyclic", "tree", "bipartite"}
+)
+
+ANALYSIS_TYPES = frozenset(
+    {"is_connected", "has_cycle", "shortest_paths", "reachable_nodes", "mst"}
+)
+
+# analysis types that require a root vertex
+ROOTED_ANALYSIS_TYPES = frozenset({"shortest_paths", "reachable_nodes"})
+
+# buffer size used when writing downloaded files to disk
+WRITE_BUFFER_SIZE = 1 << 20
 
 
 ############################################################
@@ -46,6 +110,30 @@ class Job:
         self.resultsfilekey = row["resultsfilekey"]
 
 
+###################################################################
+#
+# backoff_delay
+#
+# Exponential backoff with jitter, so that clients retrying at
+# the same time (e.g. after API Gateway throttling) spread out
+# their retries rather than all hitting the server together.
+#
+def backoff_delay(retries):
+    """
+    Returns the number of seconds to wait before the given retry
+
+    Parameters
+    ----------
+    retries: number of failed attempts so far (1, 2, ...)
+
+    Returns
+    -------
+    delay in seconds, at most 30
+    """
+
+    return min(30, 2 ** (retries - 1) * (1 + random.random() * 0.5))
+
+
 ###################################################################
 #
 # web_service_req
@@ -54,20 +142,24 @@ class Job:
 # The better approach is to repeat at least N times (typically
 # N=3), and then give up after N tries.
 #
-def web_service_req(url, action, body=None):
+def web_service_req(url, action, body=None, params=None):
     """
     Submits an HTTP request to a web service at most 3 times, since
     web services can fail to respond e.g. to heavy user or internet
     traffic. If the web service responds with status code 200, 400
     or 500, we consider this a valid response and return the response.
-    Otherwise we try again, at most 3 times. After 3 attempts the
-    function returns with the last response.
+    Otherwise (or if the connection fails or times out) we try again,
+    at most 3 times, backing off exponentially between attempts. After
+    3 attempts the function returns with the last response.
 
     Parameters
     ----------
     url: url for calling the web service
     action: the HTTP verb to use in the request
-    body: body data to provide in the request
+    body: body data to provide in the request, either an object
+      to serialize as JSON or an already-serialized JSON document
+      as bytes
+    params: optional dict of query string parameters
 
     Returns
     -------
@@ -78,16 +170,31 @@ def web_service_req(url, action, body=None):
         retries = 0
 
         while True:
-            if action == "GET":
-                response = requests.get(url)
-            elif action == "DELETE":
-                response = requests.delete(url)
-            elif action == "POST":
-                response = requests.post(url, json=body)
-            else:
-                raise Exception("HTTP verb must be in ['GET', 'POST', 'DELETE']")
+            try:
+                if action == "POST" and isinstance(body, bytes):
+                    # body is an already-serialized JSON document
+                    response = SESSION.post(
+                        url, params=params, data=body, headers=JSON_HEADERS
+                    )
+                elif action == "POST":
+                    response = SESSION.post(url, params=params, json=body)
+                elif action in VERBS:
+                    response = VERBS[action](url, params=params)
+                else:
+                    raise Exception("HTTP verb must be in ['GET', 'POST', 'DELETE']")
+
+            except (requests.ConnectionError, requests.Timeout):
+                #
+                # transient network failure, try again unless this
+                # was our last attempt:
+                #
+                retries = retries + 1
+                if retries < 3:
+                    time.sleep(backoff_delay(retries))
+                    continue
+                raise
 
-            if response.status_code in [200, 400, 404, 481, 482, 500]:
+            if response.status_code in FINAL_STATUS_CODES:
                 #
                 # we consider this a successful call and response
                 #
@@ -99,7 +206,7 @@ def web_service_req(url, action, body=None):
             retries = retries + 1
             if retries < 3:
                 # try at most 3 times
-                time.sleep(retries)
+                time.sleep(backoff_delay(retries))
                 continue
 
             #
@@ -117,6 +224,189 @@ def web_service_req(url, action, body=None):
         return None
 
 
+###################################################################
+#
+# json_loads
+#
+# orjson parses JSON considerably faster than the stdlib json
+# module and accepts bytes directly, so we use it when available.
+#
+def json_loads(data):
+    """
+    Deserializes a JSON document, using orjson if installed and
+    the stdlib json module otherwise.
+
+    Parameters
+    ----------
+    data: JSON document as bytes or str
+
+    Returns
+    -------
+    deserialized python object
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+
+    return json.loads(data)
+
+
+###################################################################
+#
+# parse_body
+#
+def parse_body(res):
+    """
+    Deserializes the JSON body of a web service response, so
+    that it is parsed once whichever status code came back
+
+    Parameters
+    ----------
+    res: response received from web service
+
+    Returns
+    -------
+    deserialized body, or {} if the response has no (JSON) body
+    """
+
+    if not res.content:
+        return {}
+
+    try:
+        return json_loads(res.content)
+    except ValueError:  # e.g. an HTML error page from the gateway
+        return {}
+
+
+###################################################################
+#
+# download_file_bytes
+#
+# The web service returns files as a presigned S3 url, so the
+# file itself is downloaded straight from S3 rather than passed
+# through API Gateway and Lambda as base64.
+#
+def download_file_bytes(body):
+    """
+    Returns the raw bytes of the file described by a web service
+    response body, fetching them from the presigned url in the body
+    or, if there is none, decoding the base64 data in the body
+
+    Parameters
+    ----------
+    body: deserialized body of a successful web service response
+
+    Returns
+    -------
+    raw file bytes
+    """
+
+    if "url" not in body:
+        return base64.b64decode(body["data"])
+
+    res = web_service_req(body["url"], "GET")
+
+    if res is None or res.status_code != 200:
+        status = None if res is None else res.status_code
+        raise Exception(f"download from S3 failed with status code {status}")
+
+    return res.content
+
+
+###################################################################
+#
+# write_json_file
+#
+def write_json_file(filename, json_data):
+    """
+    Serializes the given data as indented JSON and writes it to
+    a local file, using orjson if installed and the stdlib json
+    module otherwise.
+
+    Parameters
+    ----------
+    filename: name of the local file to write
+    json_data: python object to serialize
+
+    Returns
+    -------
+    nothing
+    """
+
+    #
+    # orjson serializes the whole document in one pass (indentation
+    # and trailing newline included) and hands us a single bytes
+    # object, which an unbuffered file writes with one syscall and
+    # no extra copy. The stdlib json.dump instead issues many small
+    # writes, so give it a large buffer to keep the number of write
+    # syscalls down on multi-MB results:
+    #
+    if orjson is not None:
+        options = orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE
+        with open(filename, "wb", buffering=0) as file:
+            file.write(orjson.dumps(json_data, option=options))
+    else:
+        with open(filename, "w", buffering=WRITE_BUFFER_SIZE) as file:
+            json.dump(json_data, file, indent=4)
+
+
+###################################################################
+#
+# parse_nonneg_int
+#
+def parse_nonneg_int(s):
+    """
+    Parses a string entered by the user as a non-negative integer
+
+    Parameters
+    ----------
+    s: string to parse
+
+    Returns
+    -------
+    the integer value, or None if the string is not a valid
+    non-negative integer
+    """
+
+    try:
+        value = int(s)
+    except ValueError:
+        return None
+
+    return value if value >= 0 else None
+
+
+############################################################
+#
+# make_urls
+#
+def make_urls(baseurl):
+    """
+    Builds the urls of the web service endpoints once, so the
+    command handlers don't rebuild them on every call
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service, without a trailing /
+
+    Returns
+    -------
+    namespace of endpoint urls; those ending in / expect an
+    id or type to be appended
+    """
+
+    return SimpleNamespace(
+        graph=baseurl + "/graph",
+        graph_id=baseurl + "/graph/",
+        graphs=baseurl + "/graphs",
+        jobs=baseurl + "/jobs",
+        visual=baseurl + "/visual/",
+        random=baseurl + "/random/",
+        analysis=baseurl + "/analysis/",
+        results=baseurl + "/results/",
+    )
+
+
 ############################################################
 #
 # prompt
@@ -170,14 +460,14 @@ def prompt():
 #
 # make_new_graph
 #
-def make_new_graph(baseurl):
+def make_new_graph(urls):
     """
     Prompts the user for a local filename and uploads
     that graph data file to the application.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -196,9 +486,15 @@ def make_new_graph(baseurl):
             return
 
         #
-        # check that file exists
+        # check that file exists. We keep the stat result, since its
+        # size tells us exactly how many bytes to read below:
         #
-        if not pathlib.Path(local_filename).is_file():
+        try:
+            st = os.stat(local_filename)
+        except OSError:  # not found, a non-directory in the path, etc.
+            st = None
+
+        if st is None or not stat.S_ISREG(st.st_mode):
             print(f"Graph data file {local_filename} does not exist...")
             return
 
@@ -206,26 +502,25 @@ def make_new_graph(baseurl):
         # build the data packet. First step is read the graph data file
         # as raw bytes:
         #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
+        with open(local_filename, "rb") as infile:
+            raw = infile.read(st.st_size)
 
         #
-        # now encode the file as base64. Note b64encode returns
-        # a bytes object, not a string. So then we have to convert
-        # (decode) the bytes -> string, and then we can serialize
-        # the string as JSON for upload to server:
+        # now encode the file as base64. The base64 alphabet needs
+        # no escaping in JSON, so rather than decoding the encoded
+        # bytes -> string and serializing that string as JSON, we
+        # frame the bytes as the JSON document {"data": "..."}
+        # directly for upload to server:
         #
-        datastr = base64.b64encode(bytes).decode()
-        data = {"data": datastr}
+        data = b'{"data": "' + base64.b64encode(raw) + b'"}'
 
         #
         # call the web service:
         #
-        api = "/graph"
-        url = baseurl + api
+        url = urls.graph
 
         res = web_service_req(url, "POST", data)
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -233,7 +528,6 @@ def make_new_graph(baseurl):
         if res.status_code == 200:  # success
             pass
         elif res.status_code == 400:  # various errors
-            body = res.json()
             print("Bad request...")
             print("Error message:", body["message"])
             return
@@ -243,7 +537,6 @@ def make_new_graph(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             #
             return
@@ -251,7 +544,6 @@ def make_new_graph(baseurl):
         #
         # success, extract graphid:
         #
-        body = res.json()
         graphid = body["graphid"]
 
         print("Graph successfully uploaded, graph id =", graphid)
@@ -268,14 +560,14 @@ def make_new_graph(baseurl):
 #
 # retrieve_graph
 #
-def retrieve_graph(baseurl):
+def retrieve_graph(urls):
     """
     Prompts the user for the graph id, then retrieves
     the graph data file for that graph.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -289,10 +581,10 @@ def retrieve_graph(baseurl):
         #
         # call the web service:
         #
-        api = "/graph/"
-        url = baseurl + api + graphid
+        url = urls.graph_id + graphid
 
         res = web_service_req(url, "GET")
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -308,7 +600,6 @@ def retrieve_graph(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             return
 
@@ -316,29 +607,18 @@ def retrieve_graph(baseurl):
         # if we get here, status code was 200, so we
         # have results to deserialize and save:
         #
-        body = res.json()
-        datastr = body["data"]
-
-        #
-        # encode the data string to obtain the raw bytes in base64,
-        # then call b64decode to obtain the original raw bytes.
-        # Finally, decode() the bytes to obtain the results as a
-        # printable string.
-        #
-        base64_bytes = datastr.encode()
-        bytes = base64.b64decode(base64_bytes)
-        json_data = json.loads(bytes.decode())
+        raw = download_file_bytes(body)
+        json_data = json_loads(raw)
 
         #
         # generate a unique filename for saving
         #
-        new_file_name = "graph_data_" + str(graphid) + "_" + str(uuid.uuid4()) + ".json"
+        new_file_name = "graph_data_" + str(graphid) + "_" + secrets.token_hex(8) + ".json"
 
         #
         # write graph data file to local file
         #
-        with open(new_file_name, "w") as file:
-            json.dump(json_data, file, indent=4)
+        write_json_file(new_file_name, json_data)
 
         print(f"Saved graph {graphid} data file to {new_file_name}...")
         return
@@ -354,14 +634,14 @@ def retrieve_graph(baseurl):
 #
 # delete_graph
 #
-def delete_graph(baseurl):
+def delete_graph(urls):
     """
     Prompts the user for the graph id, then deletes
     that graph.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -375,10 +655,10 @@ def delete_graph(baseurl):
         #
         # call the web service:
         #
-        api = "/graph/"
-        url = baseurl + api + graphid
+        url = urls.graph_id + graphid
 
         res = web_service_req(url, "DELETE")
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -393,7 +673,6 @@ def delete_graph(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
 
     except Exception as e:
@@ -407,13 +686,13 @@ def delete_graph(baseurl):
 #
 # get_all_graph_rows
 #
-def get_all_graph_rows(baseurl):
+def get_all_graph_rows(urls):
     """
     Prints out all the graphs in the database
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -421,42 +700,48 @@ def get_all_graph_rows(baseurl):
     """
 
     try:
+        url = urls.graphs
+
         #
-        # call the web service:
+        # the web service returns the graphs a page at a time, so
+        # keep asking for the next page until there is none:
         #
-        api = "/graphs"
-        url = baseurl + api
+        graphs = []
+        params = {}
 
-        res = web_service_req(url, "GET")
+        while True:
+            #
+            # call the web service:
+            #
+            res = web_service_req(url, "GET", params=params)
+            body = parse_body(res)
 
-        #
-        # let's look at what we got back:
-        #
-        if res.status_code == 200:  # success
-            pass
-        else:
-            # failed:
-            print("Failed with status code:", res.status_code)
-            print("url: " + url)
-            if res.status_code == 500:
-                # we'll have an error message
-                body = res.json()
-                print("Error message:", body["message"])
             #
-            return
+            # let's look at what we got back:
+            #
+            if res.status_code == 200:  # success
+                pass
+            else:
+                # failed:
+                print("Failed with status code:", res.status_code)
+                print("url: " + url)
+                if res.status_code in (400, 500):
+                    # we'll have an error message
+                    print("Error message:", body["message"])
+                #
+                return
 
-        #
-        # deserialize and extract graphs:
-        #
-        body = res.json()
+            #
+            # let's map each row into a Graph object:
+            #
+            for row in body["data"]:
+                graph = Graph(row)
+                graphs.append(graph)
 
-        #
-        # let's map each row into a Graph object:
-        #
-        graphs = []
-        for row in body["data"]:
-            graph = Graph(row)
-            graphs.append(graph)
+            if body.get("next") is None:
+                break
+
+            params = {"after_graphid": body["next"]}
 
         #
         # Now we can think OOP:
@@ -483,13 +768,13 @@ def get_all_graph_rows(baseurl):
 #
 # get_all_job_rows
 #
-def get_all_job_rows(baseurl):
+def get_all_job_rows(urls):
     """
     Prints out all the jobs in the database
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -500,10 +785,10 @@ def get_all_job_rows(baseurl):
         #
         # call the web service:
         #
-        api = "/jobs"
-        url = baseurl + api
+        url = urls.jobs
 
         res = web_service_req(url, "GET")
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -516,16 +801,10 @@ def get_all_job_rows(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             #
             return
 
-        #
-        # deserialize and extract graphs:
-        #
-        body = res.json()
-
         #
         # let's map each row into a Graph object:
         #
@@ -559,14 +838,14 @@ def get_all_job_rows(baseurl):
 #
 # get_all_job_rows
 #
-def delete_all_jobs(baseurl):
+def delete_all_jobs(urls):
     """
     Deletes all the jobs in the database and corresponding
     results files from the S3 bucket
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -577,10 +856,10 @@ def delete_all_jobs(baseurl):
         #
         # call the web service:
         #
-        api = "/jobs"
-        url = baseurl + api
+        url = urls.jobs
 
         res = web_service_req(url, "DELETE")
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -593,7 +872,6 @@ def delete_all_jobs(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
 
     except Exception as e:
@@ -607,14 +885,14 @@ def delete_all_jobs(baseurl):
 #
 # visualize_graph
 #
-def visualize_graph(baseurl):
+def visualize_graph(urls):
     """
     Prompts the user for the graph id, then retrieves
     the graph visualization file for that graph.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -628,11 +906,18 @@ def visualize_graph(baseurl):
         #
         # call the web service:
         #
-        api = "/visual/"
-        url = baseurl + api + graphid
+        url = urls.visual + graphid
 
         res = web_service_req(url, "GET")
 
+        #
+        # if API Gateway passes the PNG through as binary, there
+        # is no JSON body to deserialize:
+        #
+        is_image = res.headers.get("Content-Type", "").startswith("image/")
+
+        body = {} if is_image else parse_body(res)
+
         #
         # let's look at what we got back:
         #
@@ -647,36 +932,30 @@ def visualize_graph(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             return
 
         #
-        # if we get here, status code was 200, so we
-        # have results to deserialize and save:
-        #
-        body = res.json()
-        datastr = body["data"]
-
+        # if we get here, status code was 200, so we have the
+        # image to save. A binary PNG can be saved as is:
         #
-        # encode the data string to obtain the raw bytes in base64,
-        # then call b64decode to obtain the original raw bytes.
-        #
-        base64_bytes = datastr.encode()
-        bytes = base64.b64decode(base64_bytes)
+        if is_image:
+            raw = res.content
+        else:
+            raw = download_file_bytes(body)
 
         #
         # generate a unique filename for saving
         #
         new_file_name = (
-            "graph_visual_" + str(graphid) + "_" + str(uuid.uuid4()) + ".png"
+            "graph_visual_" + str(graphid) + "_" + secrets.token_hex(8) + ".png"
         )
 
         #
         # write graph data file to local file
         #
         with open(new_file_name, "wb") as file:
-            file.write(bytes)
+            file.write(raw)
 
         print(f"Saved graph {graphid} visualization file to {new_file_name}...")
         return
@@ -692,7 +971,7 @@ def visualize_graph(baseurl):
 #
 # make_random_graph
 #
-def make_random_graph(baseurl):
+def make_random_graph(urls):
     """
     Prompts the user for a type of graph, then
     generates and returns a graph data file containing
@@ -700,7 +979,7 @@ def make_random_graph(baseurl):
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -715,14 +994,7 @@ def make_random_graph(baseurl):
         #
         # check graph type
         #
-        if graph_type not in [
-            "any",
-            "connected",
-            "complete",
-            "acyclic",
-            "tree",
-            "bipartite",
-        ]:
+        if graph_type not in GRAPH_TYPES:
             print(f"Type {graph_type} is not a valid graph type")
             return
 
@@ -734,11 +1006,7 @@ def make_random_graph(baseurl):
         #
         if num_vertices == "-1":
             pass
-        elif (
-            not num_vertices.isnumeric()
-            or int(num_vertices) != float(num_vertices)
-            or int(num_vertices) < 0
-        ):
+        elif parse_nonneg_int(num_vertices) is None:
             print(f"Number {num_vertices} is not a valid number of vertices")
             return
 
@@ -750,27 +1018,23 @@ def make_random_graph(baseurl):
         #
         if num_edges == "-1":
             pass
-        elif (
-            not num_edges.isnumeric()
-            or int(num_edges) != float(num_edges)
-            or int(num_edges) < 0
-        ):
+        elif parse_nonneg_int(num_edges) is None:
             print(f"Number {num_edges} is not a valid number of edges")
             return
 
         #
         # call the web service:
         #
-        api = "/random/"
-        qp_list = []
+        url = urls.random + graph_type
+
+        params = {}
         if num_vertices != "-1":
-            qp_list.append(f"vertices={num_vertices}")
+            params["vertices"] = num_vertices
         if num_edges != "-1":
-            qp_list.append(f"edges={num_edges}")
-        qp = "?" + "&".join(qp_list)
-        url = baseurl + api + graph_type + qp
+            params["edges"] = num_edges
 
-        res = web_service_req(url, "GET")
+        res = web_service_req(url, "GET", params=params)
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -778,7 +1042,6 @@ def make_random_graph(baseurl):
         if res.status_code == 200:  # success
             pass
         elif res.status_code == 400:  # various errors
-            body = res.json()
             print(f"Random graph could not be generated...")
             print("Error message:", body["message"])
             return
@@ -788,7 +1051,6 @@ def make_random_graph(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             return
 
@@ -796,29 +1058,18 @@ def make_random_graph(baseurl):
         # if we get here, status code was 200, so we
         # have results to deserialize and save:
         #
-        body = res.json()
-        datastr = body["data"]
-
-        #
-        # encode the data string to obtain the raw bytes in base64,
-        # then call b64decode to obtain the original raw bytes.
-        # Finally, decode() the bytes to obtain the results as a
-        # printable string.
-        #
-        base64_bytes = datastr.encode()
-        bytes = base64.b64decode(base64_bytes)
-        json_data = json.loads(bytes.decode())
+        raw = download_file_bytes(body)
+        json_data = json_loads(raw)
 
         #
         # generate a unique filename for saving
         #
-        new_file_name = "graph_data_random_" + str(uuid.uuid4()) + ".json"
+        new_file_name = "graph_data_random_" + secrets.token_hex(8) + ".json"
 
         #
         # write graph data file to local file
         #
-        with open(new_file_name, "w") as file:
-            json.dump(json_data, file, indent=4)
+        write_json_file(new_file_name, json_data)
 
         print(f"Saved random graph {body["graphid"]} data file to {new_file_name}...")
         return
@@ -834,14 +1085,14 @@ def make_random_graph(baseurl):
 #
 # start_graph_analysis
 #
-def start_graph_analysis(baseurl):
+def start_graph_analysis(urls):
     """
     Starts a asynchronous job to analyze the
     specified graph in the specified way.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -859,44 +1110,36 @@ def start_graph_analysis(baseurl):
         #
         # check analysis type
         #
-        if analysis_type not in [
-            "is_connected",
-            "has_cycle",
-            "shortest_paths",
-            "reachable_nodes",
-            "mst",
-        ]:
+        if analysis_type not in ANALYSIS_TYPES:
             print(f"Type {analysis_type} is not a valid analysis type")
             return
 
         #
         # get root identifier for some types of analysis
         #
-        if analysis_type in ["shortest_paths", "reachable_nodes"]:
+        if analysis_type in ROOTED_ANALYSIS_TYPES:
             print("Enter root vertex identifier>")
             root_id = input()
 
             #
             # check root identifier
             #
-            if not root_id.isnumeric() or int(root_id) != float(root_id):
+            if parse_nonneg_int(root_id) is None:
                 print(f"Identifier {root_id} is not a valid root vertex identifier")
                 return
 
-            #
-            # call the web service:
-            #
-            api = "/analysis/"
-            url = baseurl + api + graphid + "/" + analysis_type + f"?root={root_id}"
+            params = {"root": root_id}
 
         else:
-            #
-            # call the web service:
-            #
-            api = "/analysis/"
-            url = baseurl + api + graphid + "/" + analysis_type
+            params = {}
 
-        res = web_service_req(url, "GET")
+        #
+        # call the web service:
+        #
+        url = urls.analysis + graphid + "/" + analysis_type
+
+        res = web_service_req(url, "GET", params=params)
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -907,7 +1150,6 @@ def start_graph_analysis(baseurl):
             print(f"Graph {graphid} does not exist in the database...")
             return
         elif res.status_code == 400:  # various errors
-            body = res.json()
             print(f"Could not start a graph analysis job...")
             print("Error message:", body["message"])
             return
@@ -917,7 +1159,6 @@ def start_graph_analysis(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             return
 
@@ -925,10 +1166,18 @@ def start_graph_analysis(baseurl):
         # if we get here, status code was 200, so we
         # have a jobid for the analysis job
         #
-        body = res.json()
         jobid = body["jobid"]
 
         print(f"Successfully started a graph analysis job, job id = {jobid}")
+
+        #
+        # watch the job in the background so the user can keep
+        # issuing commands while the analysis runs:
+        #
+        watcher = threading.Thread(
+            target=poll_analysis_job, args=(urls, jobid), daemon=True
+        )
+        watcher.start()
         return
 
     except Exception as e:
@@ -938,18 +1187,71 @@ def start_graph_analysis(baseurl):
         return
 
 
+############################################################
+#
+# poll_analysis_job
+#
+def poll_analysis_job(urls, jobid):
+    """
+    Polls the status of an analysis job in the background, with
+    exponentially increasing delays, until the job is no longer
+    processing, and then notifies the user.
+
+    Parameters
+    ----------
+    urls: web service endpoint urls, see make_urls()
+    jobid: id of the analysis job to poll
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        url = urls.results + str(jobid)
+
+        #
+        # waits of 2, 4, 8, ... seconds, capped at a minute, which
+        # covers the 10 minute timeout of the analysis function:
+        #
+        for attempt in range(15):
+            time.sleep(min(60, 2 * 2**attempt))
+
+            res = web_service_req(url, "GET")
+
+            if res is None:  # web service unreachable, give up
+                return
+            elif res.status_code == 481:  # not ready
+                continue
+            elif res.status_code == 200:  # success
+                print()
+                print(f"** Job {jobid} has completed, use command 10 to get the results")
+            elif res.status_code == 482:  # unknown error
+                print()
+                print(f"** Job {jobid} terminated with an unknown error...")
+            return
+
+    except Exception as e:
+        logging.error("**ERROR: poll_analysis_job() failed:")
+        logging.error("url: " + url)
+        logging.error(e)
+        return
+
+
 ############################################################
 #
 # get_analysis_results
 #
-def get_analysis_results(baseurl):
+def get_analysis_results(urls):
     """
     Retrieve the status and results (if available) of
-    the specified analysis job.
+    the specified analysis jobs. Multiple job ids can be
+    given separated by commas, in which case the results
+    are retrieved concurrently.
 
     Parameters
     ----------
-    baseurl: baseurl for web service
+    urls: web service endpoint urls, see make_urls()
 
     Returns
     -------
@@ -957,16 +1259,63 @@ def get_analysis_results(baseurl):
     """
 
     try:
-        print("Enter job id>")
-        jobid = input()
+        print("Enter job id (or comma-separated job ids)>")
+        jobids = [jobid.strip() for jobid in input().split(",")]
+        jobids = [jobid for jobid in jobids if jobid != ""]
+
+        if len(jobids) == 0:
+            print("No job id given...")
+            return
 
         #
-        # call the web service:
+        # call the web service, once per job. These calls are
+        # network-bound, so we issue them concurrently over the
+        # shared session:
         #
-        api = "/results/"
-        url = baseurl + api + jobid
+        url = urls.results
 
-        res = web_service_req(url, "GET")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = {
+                executor.submit(web_service_req, url + jobid, "GET"): jobid
+                for jobid in jobids
+            }
+
+            for future in as_completed(futures):
+                jobid = futures[future]
+                save_analysis_results(url + jobid, jobid, future.result())
+
+        return
+
+    except Exception as e:
+        logging.error("**ERROR: get_analysis_results() failed:")
+        logging.error("url: " + url)
+        logging.error(e)
+        return
+
+
+############################################################
+#
+# save_analysis_results
+#
+def save_analysis_results(url, jobid, res):
+    """
+    Reports the status of an analysis job from the web service
+    response, and saves its results (if available) to a local
+    file.
+
+    Parameters
+    ----------
+    url: url that was called for the job
+    jobid: id of the analysis job
+    res: response received from web service
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        body = parse_body(res)
 
         #
         # let's look at what we got back:
@@ -988,7 +1337,6 @@ def get_analysis_results(baseurl):
             print("url: " + url)
             if res.status_code == 500:
                 # we'll have an error message
-                body = res.json()
                 print("Error message:", body["message"])
             return
 
@@ -996,40 +1344,47 @@ def get_analysis_results(baseurl):
         # if we get here, status code was 200, so we
         # have results to deserialize and save:
         #
-        body = res.json()
-        datastr = body["data"]
-
-        #
-        # encode the data string to obtain the raw bytes in base64,
-        # then call b64decode to obtain the original raw bytes.
-        # Finally, decode() the bytes to obtain the results as a
-        # printable string.
-        #
-        base64_bytes = datastr.encode()
-        bytes = base64.b64decode(base64_bytes)
-        json_data = json.loads(bytes.decode())
+        raw = download_file_bytes(body)
+        json_data = json_loads(raw)
 
         #
         # generate a unique filename for saving
         #
-        new_file_name = "job_analysis_" + str(jobid) + "_" + str(uuid.uuid4()) + ".json"
+        new_file_name = "job_analysis_" + str(jobid) + "_" + secrets.token_hex(8) + ".json"
 
         #
         # write graph analysis file to local file
         #
-        with open(new_file_name, "w") as file:
-            json.dump(json_data, file, indent=4)
+        write_json_file(new_file_name, json_data)
 
         print(f"Saved job {jobid} analysis results to {new_file_name}...")
         return
 
     except Exception as e:
-        logging.error("**ERROR: get_analysis_results() failed:")
+        logging.error("**ERROR: save_analysis_results() failed:")
         logging.error("url: " + url)
         logging.error(e)
         return
 
 
+############################################################
+#
+# command table: maps command numbers to their handlers
+#
+COMMANDS = {
+    1: make_new_graph,
+    2: retrieve_graph,
+    3: delete_graph,
+    4: get_all_graph_rows,
+    5: get_all_job_rows,
+    6: delete_all_jobs,
+    7: visualize_graph,
+    8: make_random_graph,
+    9: start_graph_analysis,
+    10: get_analysis_results,
+}
+
+
 ############################################################
 # main
 #
@@ -1084,9 +1439,9 @@ try:
         print("**ERROR: your URL starts with 'http', it should start with 'https'")
         sys.exit(0)
 
-    lastchar = baseurl[len(baseurl) - 1]
-    if lastchar == "/":
-        baseurl = baseurl[:-1]
+    baseurl = baseurl.rstrip("/")
+
+    urls = make_urls(baseurl)
 
     #
     # main processing loop:
@@ -1095,26 +1450,9 @@ try:
 
     while cmd != 0:
         #
-        if cmd == 1:
-            make_new_graph(baseurl)
-        elif cmd == 2:
-            retrieve_graph(baseurl)
-        elif cmd == 3:
-            delete_graph(baseurl)
-        elif cmd == 4:
-            get_all_graph_rows(baseurl)
-        elif cmd == 5:
-            get_all_job_rows(baseurl)
-        elif cmd == 6:
-            delete_all_jobs(baseurl)
-        elif cmd == 7:
-            visualize_graph(baseurl)
-        elif cmd == 8:
-            make_random_graph(baseurl)
-        elif cmd == 9:
-            start_graph_analysis(baseurl)
-        elif cmd == 10:
-            get_analysis_results(baseurl)
+        handler = COMMANDS.get(cmd)
+        if handler is not None:
+            handler(urls)
         else:
             print("** Unknown command, try again...")
         #
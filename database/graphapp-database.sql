@@ -7,22 +7,21 @@ DROP TABLE IF EXISTS graphs;
 
 CREATE TABLE graphs
 (
-    graphid           int not null AUTO_INCREMENT,
+    graphid           char(36) not null,  -- uuid, generated by the lambda functions
     datafilekey       varchar(256) not null,
     visualfilekey     varchar(256),
     PRIMARY KEY (graphid)
 );
 
-ALTER TABLE graphs AUTO_INCREMENT = 10001;  -- starting value
-
 CREATE TABLE jobs
 (
     jobid             int not null AUTO_INCREMENT,
-    graphid           int not null,
+    graphid           char(36) not null,
     status            varchar(256) not null,
     resultsfilekey    varchar(256),
     PRIMARY KEY (jobid),
-    FOREIGN KEY (graphid) REFERENCES graphs(graphid)
+    FOREIGN KEY (graphid) REFERENCES graphs(graphid),
+    INDEX (resultsfilekey)  -- for SELECT DISTINCT resultsfilekey
 );
 
 ALTER TABLE jobs AUTO_INCREMENT = 80001;  -- starting value
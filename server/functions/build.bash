@@ -0,0 +1,50 @@
+#!/bin/bash
+#
+# BASH script to package lambda functions for upload to AWS:
+#
+#   ./build.bash                        # all lambda functions
+#   ./build.bash final_generate_random  # just the ones named
+#
+# Each function's folder is zipped into ./dist/<name>.zip along
+# with precompiled bytecode (__pycache__), so a cold start does
+# not have to compile lambda_function.py, datatier.py and
+# graphapp_common.py before running them. The bytecode is
+# "unchecked-hash", i.e. python uses it without checking it
+# against the source's timestamp, which is not preserved
+# reliably once the zip is deployed.
+#
+# Run with the same python version as the lambda runtime (3.12),
+# since bytecode compiled by another version is ignored.
+#
+set -e
+cd "$(dirname "$0")"
+
+PYTHON=${PYTHON:-python3.12}
+
+if [[ $# -gt 0 ]]; then
+  functions="$@"
+else
+  functions=$(ls -d final_*/ | tr -d '/')
+fi
+
+rm -rf ./build
+mkdir -p ./build ./dist
+
+for function in $functions; do
+  echo "building $function"
+  #
+  # copy the function over, minus any stale bytecode:
+  #
+  cp -r "./$function" "./build/$function"
+  rm -rf "./build/$function/__pycache__"
+  #
+  # precompile, then zip up the folder's contents:
+  #
+  "$PYTHON" -m compileall -q --invalidation-mode unchecked-hash "./build/$function"
+  rm -f "./dist/$function.zip"
+  (cd "./build/$function" && zip -q -r "../../dist/$function.zip" .)
+done
+
+rm -rf ./build
+
+echo "done, zip files are in ./dist"
@@ -12,62 +12,57 @@
 #
 
 import json
-import boto3
-import os
 import datatier
 
-from configparser import ConfigParser
+from concurrent.futures import ThreadPoolExecutor
 
+from graphapp_common import get_bucket, get_dbConn, get_s3_client
 
-def lambda_handler(event, context):
-    try:
-        print("**STARTING**")
-        print("**lambda: final_delete_all_jobs**")
 
-        #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
+#
+# response body for success, which never changes, so it is
+# serialized once rather than on every invocation
+#
+SUCCESS_BODY = json.dumps({"message": "success"})
 
-        configur = ConfigParser()
-        configur.read(config_file)
+#
+# largest number of keys a single S3 DeleteObjects request accepts
+#
+MAX_DELETE_KEYS = 1000
 
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
+#
+# number of DeleteObjects requests sent to S3 at the same time
+#
+DELETE_WORKERS = 8
 
-        bucketname = configur.get("s3", "bucket_name")
 
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
+def lambda_handler(event, context):
+    try:
+        print("**STARTING**")
+        print("**lambda: final_delete_all_jobs**")
 
         #
-        # configure for RDS access
+        # set up S3 access, once per container, before any of the
+        # delete threads below need it
         #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        get_s3_client()
 
         #
         # open connection to database
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
-        # get all job rows from database
+        # get all job results file keys from database
         #
-        print("**Retrieving all job rows from database**")
+        print("**Retrieving all job results file keys from database**")
 
-        sql = "SELECT * FROM jobs;"
+        sql = (
+            "SELECT DISTINCT resultsfilekey FROM jobs "
+            "WHERE resultsfilekey IS NOT NULL;"
+        )
 
         rows = datatier.retrieve_all_rows(dbConn, sql)
 
@@ -76,11 +71,21 @@ def lambda_handler(event, context):
         #
         print("**Deleting all job results files from S3**")
 
-        for row in rows:
-            resultsfilekey = row[3]
+        keys = [{"Key": row[0]} for row in rows]
 
-            if resultsfilekey != None:
-                bucket.delete_objects(Delete={"Objects": [{"Key": resultsfilekey}]})
+        #
+        # S3 accepts at most 1000 keys per DeleteObjects request, so
+        # split the keys into chunks and delete the chunks in parallel
+        #
+        chunks = [
+            keys[i : i + MAX_DELETE_KEYS] for i in range(0, len(keys), MAX_DELETE_KEYS)
+        ]
+
+        if len(chunks) == 1:
+            _delete_chunk(chunks[0])
+        elif len(chunks) > 1:
+            with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as executor:
+                list(executor.map(_delete_chunk, chunks))
 
         #
         # delete all job rows from database
@@ -98,7 +103,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success"}),
+            "body": SUCCESS_BODY,
         }
 
     #
@@ -112,3 +117,20 @@ def lambda_handler(event, context):
             "statusCode": 500,
             "body": json.dumps({"message": str(err)}),
         }
+
+
+def _delete_chunk(chunk):
+    """
+    Deletes one chunk of at most 1000 keys from the S3 bucket
+
+    Parameters
+    ----------
+    chunk : list of {"Key": key} dicts
+
+    Returns
+    -------
+    nothing
+    """
+    get_s3_client().delete_objects(
+        Bucket=get_bucket().name, Delete={"Objects": chunk, "Quiet": True}
+    )
@@ -12,11 +12,16 @@
 #
 
 import json
-import boto3
-import os
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import get_bucket, get_dbConn
+
+
+#
+# response body for success, which never changes, so it is
+# serialized once rather than on every invocation
+#
+SUCCESS_BODY = json.dumps({"message": "success"})
 
 
 def lambda_handler(event, context):
@@ -25,48 +30,20 @@ def lambda_handler(event, context):
         print("**lambda: final_delete_graph**")
 
         #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
+        # set up S3 access, once per container
         #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
 
         #
         # get graphid from request
         #
         print("**Accessing event/pathParameters**")
 
-        if "graphid" in event:
-            graphid = event["graphid"]
-        elif "pathParameters" in event:
-            if "graphid" in event["pathParameters"]:
-                graphid = event["pathParameters"]["graphid"]
-            else:
-                raise Exception("endpoint requires graphid parameter in pathParameters")
-        else:
-            raise Exception("endpoint requires graphid parameter in event")
+        path_params = event.get("pathParameters") or {}
+        graphid = event.get("graphid") or path_params.get("graphid")
+
+        if graphid is None:
+            raise Exception("endpoint requires graphid parameter")
 
         print("Requested graphid:", graphid)
 
@@ -75,16 +52,17 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get graph row from database
         #
         print("**Retrieving graph row from database**")
 
-        sql = "SELECT * FROM graphs WHERE graphid = %s;"
+        sql = (
+            "SELECT datafilekey, visualfilekey FROM graphs WHERE graphid = %s "
+            "LIMIT 1;"
+        )
 
         row = datatier.retrieve_one_row(dbConn, sql, [graphid])
 
@@ -97,8 +75,8 @@ def lambda_handler(event, context):
                 ),
             }
 
-        datafilekey = row[1]
-        visualfilekey = row[2]
+        datafilekey = row[0]
+        visualfilekey = row[1]
 
         print("Successfully retrieved row:", row)
 
@@ -112,15 +90,15 @@ def lambda_handler(event, context):
         datatier.perform_action(dbConn, sql, [graphid])
 
         #
-        # delete graph data file from S3
+        # delete graph data file and visualization file (if any)
+        # from S3 in a single request
         #
-        bucket.delete_object(datafilekey)
+        objs = [{"Key": datafilekey}]
 
-        #
-        # delete graph visualization file from S3
-        #
-        if visualfilekey != None:
-            bucket.delete_object(visualfilekey)
+        if visualfilekey is not None:
+            objs.append({"Key": visualfilekey})
+
+        bucket.delete_objects(Delete={"Objects": objs, "Quiet": True})
 
         #
         # success: 200 OK
@@ -129,7 +107,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success"}),
+            "body": SUCCESS_BODY,
         }
 
     #
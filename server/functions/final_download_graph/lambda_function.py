@@ -12,12 +12,14 @@
 #
 
 import json
-import boto3
-import os
-import base64
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import (
+    get_bucket,
+    get_dbConn,
+    get_s3_client,
+    PRESIGNED_URL_EXPIRES,
+)
 
 
 def lambda_handler(event, context):
@@ -26,48 +28,21 @@ def lambda_handler(event, context):
         print("**lambda: final_download_graph**")
 
         #
-        # set up AWS based on config file
+        # set up S3 access, once per container
         #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
+        s3_client = get_s3_client()
 
         #
         # get graphid from request
         #
         print("**Accessing event/pathParameters**")
 
-        if "graphid" in event:
-            graphid = event["graphid"]
-        elif "pathParameters" in event:
-            if "graphid" in event["pathParameters"]:
-                graphid = event["pathParameters"]["graphid"]
-            else:
-                raise Exception("endpoint requires graphid parameter in pathParameters")
-        else:
-            raise Exception("endpoint requires graphid parameter in event")
+        path_params = event.get("pathParameters") or {}
+        graphid = event.get("graphid") or path_params.get("graphid")
+
+        if graphid is None:
+            raise Exception("endpoint requires graphid parameter")
 
         print("Requested graphid:", graphid)
 
@@ -76,16 +51,14 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get graph row from database
         #
         print("**Retrieving graph row from database**")
 
-        sql = "SELECT * FROM graphs WHERE graphid = %s;"
+        sql = "SELECT datafilekey FROM graphs WHERE graphid = %s LIMIT 1;"
 
         row = datatier.retrieve_one_row(dbConn, sql, [graphid])
 
@@ -101,31 +74,21 @@ def lambda_handler(event, context):
                 ),
             }
 
-        datafilekey = row[1]
+        datafilekey = row[0]
 
         print("Successfully retrieved row:", row)
 
         #
-        # download file from bucket
+        # presigned url, so the client downloads the file straight
+        # from S3 rather than through this function
         #
-        local_filename = "/tmp/local_graph_data_file.json"
-
-        print("**Downloading graph from S3**")
-
-        bucket.download_file(datafilekey, local_filename)
+        print("**Presigning S3 download url**")
 
-        #
-        # read bytes from downloaded file
-        #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
-
-        #
-        # convert file byte format
-        #
-        data = base64.b64encode(bytes)
-        datastr = data.decode()
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket.name, "Key": datafilekey},
+            ExpiresIn=PRESIGNED_URL_EXPIRES,
+        )
 
         #
         # success: 200 OK
@@ -134,7 +97,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success", "data": datastr}),
+            "body": json.dumps({"message": "success", "url": url}),
         }
 
     #
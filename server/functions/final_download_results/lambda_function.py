@@ -12,12 +12,14 @@
 #
 
 import json
-import boto3
-import os
-import base64
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import (
+    get_bucket,
+    get_dbConn,
+    get_s3_client,
+    PRESIGNED_URL_EXPIRES,
+)
 
 
 def lambda_handler(event, context):
@@ -26,48 +28,21 @@ def lambda_handler(event, context):
         print("**lambda: final_download_results**")
 
         #
-        # set up AWS based on config file
+        # set up S3 access, once per container
         #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
+        s3_client = get_s3_client()
 
         #
         # get jobid from request
         #
         print("**Accessing event/pathParameters**")
 
-        if "jobid" in event:
-            jobid = event["jobid"]
-        elif "pathParameters" in event:
-            if "jobid" in event["pathParameters"]:
-                jobid = event["pathParameters"]["jobid"]
-            else:
-                raise Exception("endpoint requires jobid parameter in pathParameters")
-        else:
-            raise Exception("endpoint requires jobid parameter in event")
+        path_params = event.get("pathParameters") or {}
+        jobid = event.get("jobid") or path_params.get("jobid")
+
+        if jobid is None:
+            raise Exception("endpoint requires jobid parameter")
 
         print("Requested jobid:", jobid)
 
@@ -76,16 +51,14 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get job row from database
         #
         print("**Retrieving job row from database**")
 
-        sql = "SELECT * FROM jobs WHERE jobid = %s;"
+        sql = "SELECT status, resultsfilekey FROM jobs WHERE jobid = %s LIMIT 1;"
 
         row = datatier.retrieve_one_row(dbConn, sql, [jobid])
 
@@ -101,14 +74,12 @@ def lambda_handler(event, context):
                 ),
             }
 
-        graphid = row[1]
-        status = row[2]
-        resultsfilekey = row[3]
-
-        print("Successfully retrieved row:", row)
+        status = row[0]
+        resultsfilekey = row[1]
 
         #
-        # status: still processing
+        # status: still processing (the common case while a client is
+        # polling, so return before doing anything else)
         #
         if status == "processing":
             return {
@@ -144,6 +115,7 @@ def lambda_handler(event, context):
         #
         # status: completed successfully (even if analysis itself failed)
         #
+        print("Successfully retrieved row:", row)
 
         #
         # sanity check: we have a results file
@@ -152,26 +124,16 @@ def lambda_handler(event, context):
             raise Exception(f"jobid {jobid} has completed but has no results file key")
 
         #
-        # download file from bucket
+        # presigned url, so the client downloads the file straight
+        # from S3 rather than through this function
         #
-        local_filename = "/tmp/local_graph_results_file.json"
+        print("**Presigning S3 download url**")
 
-        print("**Downloading graph from S3**")
-
-        bucket.download_file(resultsfilekey, local_filename)
-
-        #
-        # read bytes from downloaded file
-        #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
-
-        #
-        # convert file byte format
-        #
-        data = base64.b64encode(bytes)
-        datastr = data.decode()
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket.name, "Key": resultsfilekey},
+            ExpiresIn=PRESIGNED_URL_EXPIRES,
+        )
 
         #
         # success: 200 OK
@@ -180,7 +142,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success", "data": datastr}),
+            "body": json.dumps({"message": "success", "url": url}),
         }
 
     #
@@ -36,11 +36,18 @@ def get_dbConn(endpoint, portnum, username, pwd, dbname):
   a connection object
   """
   try:
+    #
+    # autocommit, so a connection reused across invocations never
+    # reads from a stale snapshot; a short connect timeout, so a
+    # dead endpoint (or RDS Proxy) is detected quickly
+    #
     dbConn = pymysql.connect(host=endpoint,
                              port=portnum,
                              user=username,
                              passwd=pwd,
-                             database=dbname)
+                             database=dbname,
+                             autocommit=True,
+                             connect_timeout=2)
 
     return dbConn
 
@@ -143,6 +150,51 @@ def retrieve_all_rows(dbConn, sql, parameters=[]):
     dbCursor.close()
 
 
+##################################################################
+#
+# retrieve_rows_unbuffered:
+#
+# Given a database connection and an SQL Select query,
+# executes this query against the database and yields the
+# rows (tuples) one at a time as they arrive from the
+# server, rather than first buffering them all in memory.
+# The rows must all be consumed before the connection is
+# used for another query. The query can be parameterized
+# using %s, in which case pass the values as a list
+# [value1, value2, ...]
+#
+def retrieve_rows_unbuffered(dbConn, sql, parameters=[]):
+  """
+  Executes an sql SELECT query against the database connection
+  and yields the rows one at a time as tuples
+
+  Parameters
+  __________
+  dbConn : the database connection, 
+  sql : the SQL SELECT query (can be parameterized with %s),
+  parameters: optional list of values if parameterized
+
+  Returns
+  _______
+  Generator of rows as tuples, yielding nothing if SELECT
+  retrieves no data
+  """
+
+  dbCursor = dbConn.cursor(pymysql.cursors.SSCursor)
+
+  try:
+    dbCursor.execute(sql, parameters)
+    yield from dbCursor
+
+  except Exception as err:
+    print("datatier.retrieve_rows_unbuffered() failed:")
+    print(str(err))
+    raise
+
+  finally:
+    dbCursor.close()
+
+
 ###############################################################
 #
 # perform_action:
@@ -190,3 +242,50 @@ def perform_action(dbConn, sql, parameters=[]):
 
   finally:
     dbCursor.close()
+
+
+###############################################################
+#
+# perform_action_returning_id:
+#
+# Given a database connection and an SQL INSERT query,
+# executes the query and returns the id that mysql
+# auto-generated for the new row, in the same round-trip
+# (rather than a separate "SELECT LAST_INSERT_ID()").
+# The query can be parameterized using %s, in which case
+# pass the values as a list [value1, value2, ...]
+#
+def perform_action_returning_id(dbConn, sql, parameters=[]):
+  """
+  Executes an sql INSERT query against the database connection
+  and returns the auto-generated id of the inserted row
+
+  Parameters
+  __________
+  dbConn : the database connection, 
+  sql : the SQL INSERT query (can be parameterized with %s),
+  parameters: optional list of values if parameterized
+
+  Returns
+  _______
+  auto-generated id of the inserted row
+  """
+
+  dbCursor = dbConn.cursor()
+
+  try:
+    # try to execute, and if successful commit the changes
+    # and return the id generated for the new row:
+    dbCursor.execute(sql, parameters)
+    dbConn.commit()
+    return dbCursor.lastrowid
+
+  except Exception as err:
+    # failed, rollback any possible changes and log error:
+    dbConn.rollback()
+    print("datatier.perform_action_returning_id() failed:")
+    print(str(err))
+    raise
+
+  finally:
+    dbCursor.close()
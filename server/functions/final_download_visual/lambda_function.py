@@ -11,66 +11,58 @@
 #   CS 310
 #
 
-import os
+import io
 import json
-import boto3
 import uuid
-import base64
 import datatier
 import networkx as nx
-import matplotlib.pyplot as plt
+import matplotlib
 
-from configparser import ConfigParser
+matplotlib.use("Agg")  # render straight to PNG, no display backend probing
 
+import matplotlib.pyplot as plt
 
-def lambda_handler(event, context):
-    try:
-        print("**STARTING**")
-        print("**lambda: final_download_visual**")
+from graphapp_common import (
+    get_bucket,
+    get_dbConn,
+    get_s3_client,
+    PRESIGNED_URL_EXPIRES,
+)
 
-        #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
 
-        configur = ConfigParser()
-        configur.read(config_file)
+#
+# figure reused by every visual drawn in this container
+#
+_fig = plt.figure()
 
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
+#
+# graphs with more vertices than this are laid out randomly, since
+# spring_layout is quadratic in the number of vertices
+#
+MAX_SPRING_LAYOUT_NODES = 200
 
-        bucketname = configur.get("s3", "bucket_name")
 
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
+def lambda_handler(event, context):
+    try:
+        print("**STARTING**")
+        print("**lambda: final_download_visual**")
 
         #
-        # configure for RDS access
+        # set up S3 access, once per container
         #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
+        s3_client = get_s3_client()
 
         #
         # get graphid from request
         #
         print("**Accessing event/pathParameters**")
 
-        if "graphid" in event:
-            graphid = event["graphid"]
-        elif "pathParameters" in event:
-            if "graphid" in event["pathParameters"]:
-                graphid = event["pathParameters"]["graphid"]
-            else:
-                raise Exception("endpoint requires graphid parameter in pathParameters")
-        else:
-            raise Exception("endpoint requires graphid parameter in event")
+        path_params = event.get("pathParameters") or {}
+        graphid = event.get("graphid") or path_params.get("graphid")
+
+        if graphid is None:
+            raise Exception("endpoint requires graphid parameter")
 
         print("Requested graphid:", graphid)
 
@@ -79,16 +71,17 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get graph row from database
         #
         print("**Retrieving graph row from database**")
 
-        sql = "SELECT * FROM graphs WHERE graphid = %s;"
+        sql = (
+            "SELECT datafilekey, visualfilekey FROM graphs WHERE graphid = %s "
+            "LIMIT 1;"
+        )
 
         row = datatier.retrieve_one_row(dbConn, sql, [graphid])
 
@@ -104,8 +97,8 @@ def lambda_handler(event, context):
                 ),
             }
 
-        datafilekey = row[1]
-        visualfilekey = row[2]
+        datafilekey = row[0]
+        visualfilekey = row[1]
 
         print("Successfully retrieved row:", row)
 
@@ -116,85 +109,86 @@ def lambda_handler(event, context):
             print("**Generating visual for graph**")
 
             #
-            # download file from bucket
+            # read file bytes from bucket, straight into memory
             #
-            local_filename = "/tmp/local_graph_data_file.json"
-
             print("**Downloading graph from S3**")
 
-            bucket.download_file(datafilekey, local_filename)
-
-            #
-            # read bytes from downloaded file
-            #
-            infile = open(local_filename, "rb")
-            bytes = infile.read()
-            infile.close()
+            obj = s3_client.get_object(Bucket=bucket.name, Key=datafilekey)
+            body = obj["Body"].read()
 
             #
             # generate equivalent networkx graph
             #
-            graph_data = json.loads(bytes.decode())
+            graph_data = json.loads(body.decode())
 
             nx_graph = make_nx_graph(graph_data)
 
             #
-            # create PNG visualization file
+            # create PNG visualization, in memory
             #
-            local_filename = "/tmp/local_graph_visual_file.png"
-
             print("**Creating graph visualization file**")
 
-            pos = pos = nx.spring_layout(nx_graph)
-
-            nx.draw_networkx_nodes(nx_graph, pos=pos, node_size=700, alpha=0.9)
+            _fig.clear()
+            ax = _fig.add_subplot()
 
-            nx.draw_networkx_edges(
-                nx_graph, pos=pos, width=1.5, alpha=0.7, edge_color="gray"
-            )
+            if nx_graph.number_of_nodes() > MAX_SPRING_LAYOUT_NODES:
+                pos = nx.random_layout(nx_graph, seed=42)
+            else:
+                pos = nx.spring_layout(nx_graph, iterations=20, seed=42)
 
-            nx.draw_networkx_labels(
+            nx.draw_networkx(
                 nx_graph,
                 pos=pos,
+                ax=ax,
+                node_size=700,
+                alpha=0.9,
+                width=1.5,
+                edge_color="gray",
                 font_size=10,
                 font_color="black",
                 font_family="sans-serif",
                 font_weight="bold",
             )
 
-            edge_labels = {}
-            for start, end, weight_dict in nx_graph.edges(data=True):
-                edge_labels[(start, end)] = weight_dict["weight"]
+            edge_labels = {
+                (start, end): weight_dict["weight"]
+                for start, end, weight_dict in nx_graph.edges(data=True)
+            }
 
             nx.draw_networkx_edge_labels(
                 nx_graph,
                 pos=pos,
+                ax=ax,
                 edge_labels=edge_labels,
                 font_size=8,
                 font_family="sans-serif",
             )
 
-            plt.axis("off")
-            plt.tight_layout()
-            plt.savefig(local_filename)
-            plt.clf()
+            ax.axis("off")
+            _fig.tight_layout()
+
+            buf = io.BytesIO()
+            _fig.savefig(buf, format="png")
+            body = buf.getvalue()
 
             #
             # generate unique filename in preparation for the S3 upload
             #
-            print("**Uploading local file to S3**")
+            print("**Uploading visual to S3**")
 
             bucketkey = "graphapp/" + "graph_visual_file_" + str(uuid.uuid4()) + ".png"
 
             print("Using S3 bucketkey:", bucketkey)
 
             #
-            # upload file to S3
+            # upload PNG to S3 straight from memory, with a single PUT
             #
-            bucket.upload_file(
-                local_filename,
-                bucketkey,
-                ExtraArgs={"ACL": "public-read", "ContentType": "application/png"},
+            s3_client.put_object(
+                Bucket=bucket.name,
+                Key=bucketkey,
+                Body=body,
+                ACL="public-read",
+                ContentType="image/png",
             )
 
             #
@@ -212,26 +206,16 @@ def lambda_handler(event, context):
             visualfilekey = bucketkey
 
         #
-        # download file from bucket
-        #
-        local_filename = "/tmp/local_graph_visual_file.png"
-
-        print("**Downloading visual from S3**")
-
-        bucket.download_file(visualfilekey, local_filename)
-
-        #
-        # read bytes from downloaded file
+        # presigned url, so the client downloads the visual straight
+        # from S3 rather than through this function
         #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
+        print("**Presigning S3 download url**")
 
-        #
-        # convert file byte format
-        #
-        data = base64.b64encode(bytes)
-        datastr = data.decode()
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket.name, "Key": visualfilekey},
+            ExpiresIn=PRESIGNED_URL_EXPIRES,
+        )
 
         #
         # success: 200 OK
@@ -240,7 +224,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success", "data": datastr}),
+            "body": json.dumps({"message": "success", "url": url}),
         }
 
     #
@@ -270,7 +254,6 @@ def make_nx_graph(graph_data):
     #
     # add all edges to graph
     #
-    for edge in graph_data["edges"]:
-        nx_graph.add_edge(edge[0], edge[1], weight=edge[2])
+    nx_graph.add_weighted_edges_from(graph_data["edges"])
 
     return nx_graph
@@ -0,0 +1,238 @@
+#
+# graphapp_common.py
+#
+# Set-up shared by the lambda functions: the settings from the
+# config file, S3 access, and the database connection. Each is
+# created once per container (the settings on cold start, the
+# rest on first use) and reused by warm invocations. Also holds
+# the JSON helpers and constants the functions have in common.
+#
+# Like datatier.py, a copy of this file lives in each lambda
+# function's folder.
+#
+# Authors:
+#   Bennett Lindberg
+#
+
+import os
+import json
+import boto3
+import datatier
+
+try:
+    import orjson
+except ImportError:  # orjson not in the lambda layer, fall back to stdlib json
+    orjson = None
+
+from configparser import ConfigParser
+from collections import namedtuple
+
+
+#
+# settings, read once per container (on cold start) rather than
+# on every invocation. Each comes from the lambda function's
+# environment variable if it is set, and from the config file
+# otherwise
+#
+Config = namedtuple("Config", "bucket rds_host rds_port rds_user rds_pwd rds_db")
+
+CONFIG_FILE = "graphapp-config.ini"
+
+_configur = ConfigParser()
+_configur.read(CONFIG_FILE)
+
+
+def _setting(env_var, section, option):
+    value = os.environ.get(env_var)
+
+    if value is None:
+        value = _configur.get(section, option)
+
+    return value
+
+
+CFG = Config(
+    bucket=_setting("GRAPHAPP_S3_BUCKET", "s3", "bucket_name"),
+    rds_host=_setting("GRAPHAPP_RDS_ENDPOINT", "rds", "endpoint"),
+    rds_port=int(_setting("GRAPHAPP_RDS_PORT", "rds", "port_number")),
+    rds_user=_setting("GRAPHAPP_RDS_USER", "rds", "user_name"),
+    rds_pwd=_setting("GRAPHAPP_RDS_PWD", "rds", "user_pwd"),
+    rds_db=_setting("GRAPHAPP_RDS_DB", "rds", "db_name"),
+)
+
+#
+# seconds a presigned download url stays valid for the client
+#
+PRESIGNED_URL_EXPIRES = 300
+
+#
+# AWS credentials come from the config file's s3readwrite profile
+# if it has one, and from the lambda function's execution role
+# otherwise
+#
+S3_PROFILE = "s3readwrite"
+
+if _configur.has_section(S3_PROFILE):
+    os.environ["AWS_SHARED_CREDENTIALS_FILE"] = CONFIG_FILE
+
+#
+# S3 bucket and lambda client, set up by the first call to
+# get_bucket() or get_lambda_client(), so that functions which
+# never touch them do not pay for the boto3 set-up
+#
+_bucket = None
+_lambda_client = None
+
+#
+# database connection, kept open across warm invocations
+#
+_dbConn = None
+
+
+def get_bucket():
+    """
+    Returns the S3 bucket named in the config file, setting up S3
+    access unless an earlier call in this container already did so
+
+    Parameters
+    ----------
+    nothing
+
+    Returns
+    -------
+    boto3 Bucket resource
+    """
+    global _bucket
+
+    if _bucket is None:
+        _setup_session()
+
+        s3 = boto3.resource("s3")
+        _bucket = s3.Bucket(CFG.bucket)
+
+    return _bucket
+
+
+def get_s3_client():
+    """
+    Returns the low-level S3 client behind the bucket, which (unlike
+    the bucket resource) is safe to share between threads
+
+    Parameters
+    ----------
+    nothing
+
+    Returns
+    -------
+    boto3 S3 client
+    """
+    return get_bucket().meta.client
+
+
+def get_lambda_client():
+    """
+    Returns a lambda client for invoking other lambda functions,
+    creating it unless an earlier call in this container already
+    did so
+
+    Parameters
+    ----------
+    nothing
+
+    Returns
+    -------
+    boto3 Lambda client
+    """
+    global _lambda_client
+
+    if _lambda_client is None:
+        _setup_session()
+
+        _lambda_client = boto3.client("lambda")
+
+    return _lambda_client
+
+
+def get_dbConn():
+    """
+    Returns the open database connection, opening a new one if
+    there is none yet or the previous one was closed
+
+    Parameters
+    ----------
+    nothing
+
+    Returns
+    -------
+    open pymysql connection object
+    """
+    global _dbConn
+
+    if _dbConn is None or not _dbConn.open:
+        _dbConn = datatier.get_dbConn(
+            CFG.rds_host, CFG.rds_port, CFG.rds_user, CFG.rds_pwd, CFG.rds_db
+        )
+    else:
+        #
+        # cheap round trip to make sure a warm connection is still
+        # alive, reconnecting if the server (or proxy) dropped it
+        #
+        _dbConn.ping(reconnect=True)
+
+    return _dbConn
+
+
+def loads_json(payload_bytes):
+    """
+    Parses JSON straight from bytes, with orjson when it is
+    available since it is several times faster than the stdlib
+    json module
+
+    Parameters
+    ----------
+    payload_bytes: JSON document as bytes (or str)
+
+    Returns
+    -------
+    deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(payload_bytes)
+
+    return json.loads(payload_bytes)
+
+
+def dumps_json(obj):
+    """
+    Serializes to JSON bytes, with orjson when it is available.
+    The shortest paths results are keyed by (int) vertex, which
+    orjson only accepts with OPT_NON_STR_KEYS; like json, it then
+    writes the keys as strings
+
+    Parameters
+    ----------
+    obj: object to serialize
+
+    Returns
+    -------
+    JSON document as bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    return json.dumps(obj).encode()
+
+
+def _setup_session():
+    """
+    Configures the default boto3 session for S3 (and lambda)
+    access, using the profile in the config file if there is one,
+    unless it is already configured
+    """
+    if boto3.DEFAULT_SESSION is not None:
+        return
+
+    if _configur.has_section(S3_PROFILE):
+        boto3.setup_default_session(profile_name=S3_PROFILE)
+    else:
+        boto3.setup_default_session()
@@ -11,104 +11,55 @@
 #
 
 import json
-import boto3
-import os
 import uuid
-import base64
 import datatier
 import random
+import numpy as np
 
-from configparser import ConfigParser
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from graphapp_common import (
+    get_bucket,
+    get_dbConn,
+    get_s3_client,
+    dumps_json,
+    PRESIGNED_URL_EXPIRES,
+)
 
-def lambda_handler(event, context):
-    try:
-        print("**STARTING**")
-        print("**lambda: final_generate_random**")
-
-        #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
 
-        configur = ConfigParser()
-        configur.read(config_file)
+#
+# threads for running the S3 upload and the database insert of a
+# new graph side by side, kept across warm invocations
+#
+_executor = ThreadPoolExecutor(max_workers=2)
 
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
+#
+# random number generator for the vectorized edge construction,
+# drawing all of a graph's weights (or tree parents) in one call
+#
+_rng = np.random.default_rng()
 
-        bucketname = configur.get("s3", "bucket_name")
 
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
+def lambda_handler(event, context):
+    try:
+        print("**STARTING**")
+        print("**lambda: final_generate_random**")
 
         #
-        # configure for RDS access
+        # set up S3 access, once per container
         #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
+        s3_client = get_s3_client()
 
         #
-        # get type from request
+        # get type, vertices and edges from request
         #
-        print("**Accessing event/pathParameters**")
-
-        if "type" in event:
-            type = event["type"]
-        elif "pathParameters" in event:
-            if "type" in event["pathParameters"]:
-                type = event["pathParameters"]["type"]
-            else:
-                raise Exception("endpoint requires type parameter in pathParameters")
-        else:
-            raise Exception("endpoint requires type parameter in event")
+        type, vertices, edges = extract_parameters(event)
 
-        print("Requested graph type:", type)
-
-        #
-        # get vertices from request
-        #
-        print("**Accessing event/queryStringParameters**")
-
-        if "vertices" in event:
-            vertices = event["vertices"]
-        elif (
-            "queryStringParameters" in event and event["queryStringParameters"] != None
-        ):
-            if "vertices" in event["queryStringParameters"]:
-                vertices = event["queryStringParameters"]["vertices"]
-            else:
-                vertices = -1
-        else:
-            vertices = -1
-
-        print("Requested graph vertices:", vertices)
+        if type is None:
+            raise Exception("endpoint requires type parameter")
 
-        #
-        # get edges from request
-        #
-        print("**Accessing event/queryStringParameters**")
-
-        if "edges" in event:
-            edges = event["edges"]
-        elif (
-            "queryStringParameters" in event and event["queryStringParameters"] != None
-        ):
-            if "edges" in event["queryStringParameters"]:
-                edges = event["queryStringParameters"]["edges"]
-            else:
-                edges = -1
-        else:
-            edges = -1
-
-        print("Requested graph edges:", edges)
+        print("Requested graph type/vertices/edges:", type, vertices, edges)
 
         #
         # validate passed parameters
@@ -119,11 +70,13 @@ def lambda_handler(event, context):
         except Exception as e:
             return {
                 "statusCode": 400,
-                "body": {
-                    "message": f"vertex or edge count is not an integer",
-                    "graphid": -1,
-                    "data": "",
-                },
+                "body": json.dumps(
+                    {
+                        "message": f"vertex or edge count is not an integer",
+                        "graphid": -1,
+                        "data": "",
+                    }
+                ),
             }
 
         validation_results = validate_parameters(type, vertices, edges)
@@ -142,89 +95,78 @@ def lambda_handler(event, context):
                 "body": json.dumps(generation_results),
             }
 
-        bytes = json.dumps(generation_results).encode()
+        bytes = dumps_json(generation_results)
 
         #
-        # copy random graph to file in tmp folder
+        # generate the graphid here rather than in mysql, so it is
+        # known without reading it back from the database, and use
+        # it for a unique filename in preparation for the S3 upload
         #
-        print("**Writing local data file**")
+        print("**Generating graphid and S3 bucketkey**")
 
-        local_filename = "/tmp/local_graph_data_file.json"
-        f = open(local_filename, "wb")
-        f.write(bytes)
-        f.close()
+        graphid = str(uuid.uuid4())
 
-        #
-        # generate unique filename in preparation for the S3 upload
-        #
-        print("**Uploading local file to S3**")
-
-        bucketkey = "graphapp/" + "graph_data_file_" + str(uuid.uuid4()) + ".json"
+        bucketkey = "graphapp/" + "graph_data_file_" + graphid + ".json"
 
         print("Using S3 bucketkey:", bucketkey)
 
-        #
-        # upload file to S3
-        #
-        bucket.upload_file(
-            local_filename,
-            bucketkey,
-            ExtraArgs={"ACL": "public-read", "ContentType": "application/json"},
-        )
-
         #
         # open connection to database
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
-        # create new graph row in database
+        # upload the graph to S3 and create its graph row in the
+        # database at the same time, since neither depends on the
+        # other. The upload goes straight from memory with a single
+        # PUT, since the graph is far too small to benefit from a
+        # multipart upload
         #
-        print("**Adding graph row to database**")
+        print("**Uploading graph to S3 and adding graph row to database**")
 
-        sql = """
-        INSERT INTO graphs(datafilekey, visualfilekey)
-                    VALUES(%s, %s);
-        """
+        upload = _executor.submit(
+            s3_client.put_object,
+            Bucket=bucket.name,
+            Key=bucketkey,
+            Body=bytes,
+            ACL="public-read",
+            ContentType="application/json",
+        )
+        insert = _executor.submit(insert_graph_row, dbConn, graphid, bucketkey)
 
-        datatier.perform_action(dbConn, sql, [bucketkey, None])
+        wait([upload, insert])
 
         #
-        # grab the graphid that was auto-generated by mysql
+        # if only one side succeeded, undo it, so we don't leave
+        # behind a graph row whose data file was never stored, or a
+        # data file that no graph row points to
         #
-        sql = "SELECT LAST_INSERT_ID();"
-
-        row = datatier.retrieve_one_row(dbConn, sql)
+        if upload.exception() is not None:
+            if insert.exception() is None:
+                sql = "DELETE FROM graphs WHERE graphid = %s;"
 
-        graphid = row[0]
+                datatier.perform_action(dbConn, sql, [graphid])
 
-        print("Created row with graphid:", graphid)
+            raise upload.exception()
 
-        #
-        # download file from bucket
-        #
-        local_filename = "/tmp/local_graph_data_file.json"
+        if insert.exception() is not None:
+            s3_client.delete_object(Bucket=bucket.name, Key=bucketkey)
 
-        print("**Downloading graph from S3**")
+            raise insert.exception()
 
-        bucket.download_file(bucketkey, local_filename)
-
-        #
-        # read bytes from downloaded file
-        #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
+        print("Created row with graphid:", graphid)
 
         #
-        # convert file byte format
+        # presigned url, so the client downloads the graph straight
+        # from S3 rather than through this function
         #
-        data = base64.b64encode(bytes)
-        datastr = data.decode()
+        url = s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket.name, "Key": bucketkey},
+            ExpiresIn=PRESIGNED_URL_EXPIRES,
+        )
 
         #
         # success: 200 OK
@@ -233,9 +175,7 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps(
-                {"message": "success", "graphid": graphid, "data": datastr}
-            ),
+            "body": json.dumps({"message": "success", "graphid": graphid, "url": url}),
         }
 
     #
@@ -251,6 +191,62 @@ def lambda_handler(event, context):
         }
 
 
+def insert_graph_row(dbConn, graphid, datafilekey):
+    #
+    # create new graph row in database
+    #
+    sql = """
+    INSERT INTO graphs(graphid, datafilekey, visualfilekey)
+                VALUES(%s, %s, %s);
+    """
+
+    datatier.perform_action(dbConn, sql, [graphid, datafilekey, None])
+
+
+def extract_parameters(event):
+    #
+    # type comes from the path, vertices and edges (both optional,
+    # -1 if not given) from the query string, unless the event
+    # passes them directly
+    #
+    path_params = event.get("pathParameters") or {}
+    query_params = event.get("queryStringParameters") or {}
+
+    type = event.get("type") or path_params.get("type")
+    vertices = event.get("vertices", query_params.get("vertices", -1))
+    edges = event.get("edges", query_params.get("edges", -1))
+
+    return type, vertices, edges
+
+
+def weighted_edges(starts, ends):
+    #
+    # pair up the start and end vertices as [start, end, weight]
+    # rows, drawing all the random weights in 1..100 at once
+    #
+    weights = _rng.integers(1, 101, size=len(starts))
+
+    return np.column_stack([starts, ends, weights])
+
+
+def sample_edges(edges, num_edges):
+    #
+    # pick num_edges of the edges at random (keeping their original
+    # order), rather than deleting random edges one at a time
+    #
+    keep = np.sort(_rng.choice(len(edges), size=num_edges, replace=False))
+
+    return edges[keep]
+
+
+def edge_index(starts, ends, num_vertices):
+    #
+    # position of each edge (start, end), start < end, in the
+    # row-major order produced by np.triu_indices(num_vertices, k=1)
+    #
+    return starts * num_vertices - starts * (starts + 1) // 2 + (ends - starts - 1)
+
+
 def validate_parameters(type, vertices, edges):
     if type not in ["any", "complete", "connected", "acyclic", "tree", "bipartite"]:
         return {
@@ -325,17 +321,13 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
                 vertices.append(i)
 
             # start with all edges existing
-            edges = []
-            for start in range(num_vertices):
-                for end in range(start + 1, num_vertices):
-                    edges.append([start, end, random.randint(1, 100)])
+            starts, ends = np.triu_indices(num_vertices, k=1)
+            edges = weighted_edges(starts, ends)
 
-            # delete random edges until we get to num_edges
-            while len(edges) > num_edges:
-                rand_edge = random.randint(0, len(edges) - 1)
-                edges.pop(rand_edge)
+            # keep a random num_edges of them
+            edges = sample_edges(edges, num_edges)
 
-            return {"vertices": vertices, "edges": edges}
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case "complete":
             if num_vertices == -1:
@@ -356,12 +348,10 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
                 vertices.append(i)
 
             # all edges must exist
-            edges = []
-            for start in range(num_vertices):
-                for end in range(start + 1, num_vertices):
-                    edges.append([start, end, random.randint(1, 100)])
+            starts, ends = np.triu_indices(num_vertices, k=1)
+            edges = weighted_edges(starts, ends)
 
-            return {"vertices": vertices, "edges": edges}
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case "connected":
             if num_vertices == -1:
@@ -387,38 +377,31 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
                 vertices.append(i)
 
             # create all possible edges
-            edges = []
-            remaining_edges = []
-            for start in range(num_vertices):
-                for end in range(start + 1, num_vertices):
-                    remaining_edges.append([start, end, random.randint(1, 100)])
+            starts, ends = np.triu_indices(num_vertices, k=1)
+            all_edges = weighted_edges(starts, ends)
 
             # start with a tree
             # each vertex can attach itself to prior vertices only
-            for i in range(1, num_vertices):
-                other = random.randint(0, i - 1)
-
-                selected_edge = None
-                for edge in remaining_edges:
-                    if edge[0] == other and edge[1] == i:
-                        selected_edge = edge
-                        break
-                if selected_edge == None:
-                    raise Exception(
-                        "could not find selected edge when building connected graph"
-                    )
-
-                edges.append(selected_edge)
-                remaining_edges.remove(selected_edge)
-
-            # add remaining edges until we get to num_edges
-            while len(edges) < num_edges:
-                rand_edge = random.randint(0, len(remaining_edges) - 1)
-                selected_edge = remaining_edges[rand_edge]
-                edges.append(selected_edge)
-                remaining_edges.remove(selected_edge)
-
-            return {"vertices": vertices, "edges": edges}
+            children = np.arange(1, num_vertices)
+            parents = _rng.integers(0, children)
+
+            # index of each tree edge (parent, child) in all_edges,
+            # computed directly rather than searched for
+            tree_edges = edge_index(parents, children, num_vertices)
+
+            # add random remaining edges until we get to num_edges
+            remaining = np.ones(len(all_edges), dtype=bool)
+            remaining[tree_edges] = False
+
+            extra_edges = _rng.choice(
+                np.flatnonzero(remaining),
+                size=num_edges - len(tree_edges),
+                replace=False,
+            )
+
+            edges = all_edges[np.concatenate([tree_edges, extra_edges])]
+
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case "acyclic":
             if num_vertices == -1:
@@ -441,23 +424,24 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
             # number of disconnected trees
             spore_count = num_vertices - num_edges
 
-            edges = []
-            offset = 0
-            for spore in range(spore_count):
-                # evenly distribute vertices between spores
-                num_spore_vertices = num_vertices // spore_count
-                if spore < num_vertices % spore_count:
-                    num_spore_vertices += 1
+            # evenly distribute vertices between spores, each spore being
+            # a run of consecutive vertices starting at its offset
+            spore_sizes = np.full(spore_count, num_vertices // spore_count)
+            spore_sizes[: num_vertices % spore_count] += 1
 
-                # each vertex can attach itself to prior spore vertices only
-                for i in range(offset + 1, offset + num_spore_vertices):
-                    edges.append(
-                        [random.randint(offset, i - 1), i, random.randint(1, 100)]
-                    )
+            offsets = np.repeat(np.cumsum(spore_sizes) - spore_sizes, spore_sizes)
 
-                offset += num_spore_vertices
+            # each vertex can attach itself to prior spore vertices only,
+            # so draw every vertex's parent in one go
+            all_vertices = np.arange(num_vertices)
+            is_child = all_vertices != offsets
 
-            return {"vertices": vertices, "edges": edges}
+            children = all_vertices[is_child]
+            parents = _rng.integers(offsets[is_child], children)
+
+            edges = weighted_edges(parents, children)
+
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case "tree":
             if num_vertices == -1:
@@ -477,12 +461,14 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
             for i in range(num_vertices):
                 vertices.append(i)
 
-            # each vertex can attach itself to prior vertices only
-            edges = []
-            for i in range(1, num_vertices):
-                edges.append([random.randint(0, i - 1), i, random.randint(1, 100)])
+            # each vertex can attach itself to prior vertices only,
+            # so draw every vertex's parent in one go
+            children = np.arange(1, num_vertices)
+            parents = _rng.integers(0, children)
+
+            edges = weighted_edges(parents, children)
 
-            return {"vertices": vertices, "edges": edges}
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case "bipartite":
             if num_vertices == -1:
@@ -511,17 +497,13 @@ def make_random_graph(type, num_vertices=-1, num_edges=-1):
                     group_B.append(i)
 
             # start with all edges existing
-            edges = []
-            for A in group_A:
-                for B in group_B:
-                    edges.append([A, B, random.randint(1, 100)])
+            starts, ends = np.meshgrid(group_A, group_B, indexing="ij")
+            edges = weighted_edges(starts.ravel(), ends.ravel())
 
-            # delete random edges until we get to num_edges
-            while len(edges) > num_edges:
-                rand_edge = random.randint(0, len(edges) - 1)
-                edges.pop(rand_edge)
+            # keep a random num_edges of them
+            edges = sample_edges(edges, num_edges)
 
-            return {"vertices": vertices, "edges": edges}
+            return {"vertices": vertices, "edges": edges.tolist()}
 
         case _:
             return {
@@ -12,10 +12,17 @@
 #
 
 import json
-import os
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import get_dbConn, dumps_json
+
+
+#
+# number of graph rows returned per page, unless the request
+# asks for fewer (or more, up to the maximum)
+#
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
 
 
 def lambda_handler(event, context):
@@ -24,47 +31,72 @@ def lambda_handler(event, context):
         print("**lambda: final_get_all_graphs**")
 
         #
-        # set up AWS based on config file
+        # open connection to database
         #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
+        print("**Opening DB connection**")
 
-        configur = ConfigParser()
-        configur.read(config_file)
+        dbConn = get_dbConn()
 
         #
-        # configure for RDS access
+        # get page size and starting point from request
         #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        query_params = event.get("queryStringParameters") or {}
+
+        after_graphid = query_params.get("after_graphid")
+
+        try:
+            limit = int(query_params.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            limit = -1
+
+        if limit <= 0 or limit > MAX_PAGE_SIZE:
+            return {
+                "statusCode": 400,
+                "body": json.dumps(
+                    {
+                        "message": f"limit must be from 1 to {MAX_PAGE_SIZE}",
+                        "data": "",
+                    }
+                ),
+            }
 
         #
-        # open connection to database
+        # get one page of graph rows from database, in graphid order
+        # (keyset pagination), streaming the rows rather than buffering
+        # them. One extra row is fetched to tell whether there is
+        # another page after this one
         #
-        print("**Opening DB connection**")
-
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        print("**Retrieving page of graph rows from database**")
+
+        if after_graphid is None:
+            sql = """
+            SELECT graphid, datafilekey, visualfilekey FROM graphs
+            ORDER BY graphid LIMIT %s;
+            """
+            parameters = [limit + 1]
+        else:
+            sql = """
+            SELECT graphid, datafilekey, visualfilekey FROM graphs
+            WHERE graphid > %s ORDER BY graphid LIMIT %s;
+            """
+            parameters = [after_graphid, limit + 1]
+
+        rows = datatier.retrieve_rows_unbuffered(dbConn, sql, parameters)
+
+        formatted_rows = [
+            {"graphid": row[0], "datafilekey": row[1], "visualfilekey": row[2]}
+            for row in rows
+        ]
 
         #
-        # get all graph rows from database
+        # graphid to pass as after_graphid for the next page, or None
+        # if this is the last page
         #
-        formatted_rows = []
-
-        print("**Retrieving all graph rows from database**")
-
-        sql = "SELECT * FROM graphs;"
-
-        rows = datatier.retrieve_all_rows(dbConn, sql)
+        next_graphid = None
 
-        for row in rows:
-            formatted_rows.append(
-                {"graphid": row[0], "datafilekey": row[1], "visualfilekey": row[2]}
-            )
+        if len(formatted_rows) > limit:
+            formatted_rows.pop()
+            next_graphid = formatted_rows[-1]["graphid"]
 
         #
         # success: 200 OK
@@ -73,7 +105,9 @@ def lambda_handler(event, context):
 
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "success", "data": formatted_rows}),
+            "body": dumps_json(
+                {"message": "success", "data": formatted_rows, "next": next_graphid}
+            ).decode(),
         }
 
     #
@@ -12,10 +12,9 @@
 #
 
 import json
-import os
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import get_dbConn
 
 
 def lambda_handler(event, context):
@@ -23,32 +22,12 @@ def lambda_handler(event, context):
         print("**STARTING**")
         print("**lambda: final_get_all_jobs**")
 
-        #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
-
         #
         # open connection to database
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get all job rows from database
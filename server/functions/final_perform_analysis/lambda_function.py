@@ -12,13 +12,16 @@
 #
 
 import json
-import boto3
-import os
+import gzip
 import uuid
 import datatier
 import heapq
+import math
+import numpy as np
 
-from configparser import ConfigParser
+from collections import deque
+
+from graphapp_common import get_bucket, get_dbConn, dumps_json, loads_json
 
 
 def lambda_handler(event, context):
@@ -27,33 +30,9 @@ def lambda_handler(event, context):
         print("**lambda: final_download_results**")
 
         #
-        # set up AWS based on config file
-        #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
+        # set up S3 access, once per container
         #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
 
         #
         # get jobid from request
@@ -74,11 +53,11 @@ def lambda_handler(event, context):
         print("**Accessing type from event payload**")
 
         if "type" in event:
-            type = event["type"]
+            analysis_type = event["type"]
         else:
             raise Exception("endpoint requires type parameter in event")
 
-        print("Requested graph type:", type)
+        print("Requested graph type:", analysis_type)
 
         #
         # get root from request
@@ -95,14 +74,19 @@ def lambda_handler(event, context):
 
         print("Requested root vertex:", root)
 
+        #
+        # get graph (small graphs only) or its data file key from
+        # request, when final_start_analysis passes them along
+        #
+        graph_data = event.get("graph")
+        datafilekey = event.get("datafilekey")
+
         #
         # open connection to database
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get job row from database
@@ -129,73 +113,63 @@ def lambda_handler(event, context):
             raise Exception("analysis trigger was activated for a finished job")
 
         #
-        # get graph row from database
+        # get graph row from database, unless the request already
+        # gave the data file key
         #
-        print("**Retrieving graph row from database**")
+        if graph_data is None and datafilekey is None:
+            print("**Retrieving graph row from database**")
 
-        sql = "SELECT * FROM graphs WHERE graphid = %s;"
+            sql = "SELECT * FROM graphs WHERE graphid = %s;"
 
-        row = datatier.retrieve_one_row(dbConn, sql, [graphid])
+            row = datatier.retrieve_one_row(dbConn, sql, [graphid])
 
-        if row == ():  # no such graph
-            print("**No such graph, returning...**")
-            raise Exception(f"graphid {graphid} does not exist in the database")
+            if row == ():  # no such graph
+                print("**No such graph, returning...**")
+                raise Exception(f"graphid {graphid} does not exist in the database")
 
-        datafilekey = row[1]
+            datafilekey = row[1]
 
-        print("Successfully retrieved row:", row)
+            print("Successfully retrieved row:", row)
 
         #
-        # download file from bucket
+        # read file bytes from bucket, straight into memory, unless
+        # the request already gave the graph
         #
-        local_filename = "/tmp/local_graph_data_file.json"
-
-        print("**Downloading graph from S3**")
+        if graph_data is None:
+            print("**Downloading graph from S3**")
 
-        bucket.download_file(datafilekey, local_filename)
+            obj = bucket.Object(datafilekey).get()
+            payload_bytes = obj["Body"].read()
 
-        #
-        # read bytes from downloaded file
-        #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
+            graph_data = loads_json(payload_bytes)
 
         #
         # perform analysis and generate results
         #
-        graph_data = json.loads(bytes.decode())
+        analysis_results = analyze_graph(analysis_type, root, graph_data)
 
-        analysis_results = analyze_graph(type, root, graph_data)
-
-        bytes = json.dumps(analysis_results).encode()
-
-        #
-        # copy analysis results to file in tmp folder
-        #
-        print("**Writing local data file**")
-
-        local_filename = "/tmp/local_analysis_results.json"
-        f = open(local_filename, "wb")
-        f.write(bytes)
-        f.close()
+        payload_bytes = dumps_json(analysis_results)
 
         #
         # generate unique filename in preparation for the S3 upload
         #
-        print("**Uploading local file to S3**")
+        print("**Uploading results to S3**")
 
         bucketkey = "graphapp/" + "graph_results_file_" + str(uuid.uuid4()) + ".json"
 
         print("Using S3 bucketkey:", bucketkey)
 
         #
-        # upload file to S3
+        # upload results to S3 straight from memory, with a single PUT.
+        # The JSON is gzipped (at the fastest level) and served with
+        # Content-Encoding: gzip, which HTTP clients decode on download
         #
-        bucket.upload_file(
-            local_filename,
-            bucketkey,
-            ExtraArgs={"ACL": "public-read", "ContentType": "application/png"},
+        bucket.put_object(
+            Key=bucketkey,
+            Body=gzip.compress(payload_bytes, compresslevel=1),
+            ACL="public-read",
+            ContentType="application/json",
+            ContentEncoding="gzip",
         )
 
         #
@@ -229,9 +203,7 @@ def lambda_handler(event, context):
         #
         # update job status: error
         #
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         print("**Updating job row with status: error**")
 
@@ -245,259 +217,258 @@ def lambda_handler(event, context):
         }
 
 
-def analyze_graph(type, root, graph_data):
+def analyze_graph(analysis_type, root, graph_data):
+    if analysis_type not in ANALYSES:
+        raise Exception(f"analysis type {analysis_type} is invalid")
+
     if root:
         root = int(root)
-    
-    # convert graph data to AL
-    # { start => { end => weight } }
-    graph_AL = {}
 
-    for vertex in graph_data["vertices"]:
-        graph_AL[int(vertex)] = {}
+    vertices, graph_AL = make_graph_AL(graph_data)
 
-    for edge in graph_data["edges"]:
-        node_A = int(edge[0])
-        node_B = int(edge[1])
-        weight = float(edge[2])
+    return ANALYSES[analysis_type](vertices, graph_AL, root)
 
+
+def make_graph_AL(graph_data):
+    # cast vertex ids and edge columns in bulk with numpy, rather
+    # than calling int() and float() on each element
+    vertices = np.asarray(graph_data["vertices"]).astype(np.int64).tolist()
+
+    edges = np.asarray(graph_data["edges"], dtype=np.float64).reshape(-1, 3)
+
+    starts = edges[:, 0].astype(np.int64).tolist()
+    ends = edges[:, 1].astype(np.int64).tolist()
+    weights = edges[:, 2].tolist()
+
+    # convert graph data to AL
+    # { start => { end => weight } }
+    graph_AL = {vertex: {} for vertex in vertices}
+
+    for node_A, node_B, weight in zip(starts, ends, weights):
         graph_AL[node_A][node_B] = weight
         graph_AL[node_B][node_A] = weight
 
-    match type:
-        case "is_connected":
-            # select an arbitrary vertex as the root
-            root = int(graph_data["vertices"][0])
+    return vertices, graph_AL
+
+
+def reachable_from(graph_AL, root):
+    # track reachable nodes
+    reachable = set([root])
+
+    # track nodes to visit next
+    queue = deque([root])
+
+    # perform BFS to find reachable nodes
+    while len(queue) > 0:
+        cur = queue.popleft()
+
+        # all neighbors are reachable
+        for destination in graph_AL[cur]:
+            if destination in reachable:
+                continue
+
+            reachable.add(destination)
+            queue.append(destination)
 
-            # track reachable nodes
-            reachable = set([root])
+    return reachable
 
-            # track nodes to visit next
-            queue = [root]
 
-            # perform BFS to find reachable nodes
-            while len(queue) > 0:
-                cur = queue.pop(0)
+def is_connected(vertices, graph_AL, root):
+    # select an arbitrary vertex as the root
+    root = vertices[0]
 
-                # all neighbors are reachable
-                for destination in graph_AL[cur]:
-                    if destination in reachable:
-                        continue
+    # find reachable nodes
+    reachable = reachable_from(graph_AL, root)
 
-                    reachable.add(destination)
-                    queue.append(destination)
+    # connected implies all nodes are reachable
+    for vertex in vertices:
+        if vertex not in reachable:
+            return {"type": "is_connected", "data": False}
 
-            # connected implies all nodes are reachable
-            for vertex in graph_data["vertices"]:
-                if int(vertex) not in reachable:
-                    return {"type": "is_connected", "data": False}
+    return {"type": "is_connected", "data": True}
 
-            return {"type": "is_connected", "data": True}
 
-        case "has_cycle":
-            # track vertices seen by DFS
-            seen = set()
+def has_cycle(vertices, graph_AL, root):
+    # track vertices seen by DFS
+    seen = set()
 
-            # perform cycle detection on all connected components
-            for root in graph_data["vertices"]:
-                root = int(root)
+    # perform cycle detection on all connected components
+    for root in vertices:
+        # vertex already seen? connected component already checked
+        if root in seen:
+            continue
 
-                # vertex already seen? connected component already checked
-                if root in seen:
-                    continue
+        # perform DFS for cycle detection, iteratively so large
+        # graphs don't hit the recursion limit. The stack holds a
+        # (vertex, parent, remaining neighbors) frame for each
+        # vertex on the current path, and on_path maps the vertices
+        # to their positions in the stack
+        seen.add(root)
 
-                # perform DFS for cycle detection
-                def dfs(cur, ancestry):
-                    seen.add(cur)
+        stack = [(root, None, iter(graph_AL[root]))]
+        on_path = {root: 0}
 
-                    # check for cycle
-                    if cur in ancestry:
-                        cycle = ancestry[0:ancestry.index(cur) + 1]
-                        cycle.insert(0, cur)
-                        return {"type": "has_cycle", "data": cycle}
+        while len(stack) > 0:
+            cur, parent, neighbors = stack[-1]
 
-                    # new ancestry
-                    copy = [cur]
-                    for node in ancestry:
-                        copy.append(node)
+            destination = next(neighbors, None)
 
-                    # check all neighbors
-                    for destination in graph_AL[cur]:
-                        if len(ancestry) == 0 or destination != ancestry[0]:
-                            # propogate result
-                            res = dfs(destination, copy)
-                            if res:
-                                return res
+            # all neighbors checked, backtrack
+            if destination is None:
+                stack.pop()
+                del on_path[cur]
+                continue
 
-                    return None
+            # don't go straight back to the parent
+            if destination == parent:
+                continue
 
-                # trigger DFS with root
-                res = dfs(root, [])
-                if res:
-                    return res
+            # check for cycle, the path back up to destination
+            if destination in on_path:
+                cycle = [destination]
+                for node, _, _ in reversed(stack[on_path[destination] :]):
+                    cycle.append(node)
 
-            return {"type": "has_cycle", "data": False}
+                return {"type": "has_cycle", "data": cycle}
 
-        case "shortest_paths":
-            # track pred for each node
-            pred = {root: None}
+            # go deeper
+            seen.add(destination)
+            on_path[destination] = len(stack)
+            stack.append((destination, cur, iter(graph_AL[destination])))
 
-            # track shortest dist for each node
-            dist = {root: 0}
+    return {"type": "has_cycle", "data": False}
 
-            # track visited vertices
-            visited = set()
-
-            pq = [(0, root)]
 
-            # find shortest paths with Dijkstra's algorithm
-            while len(pq) > 0:
-                _, cur = heapq.heappop(pq)
+def shortest_paths(vertices, graph_AL, root):
+    # track pred for each node
+    pred = {root: None}
 
-                # skip visited nodes
-                if cur in visited:
-                    continue
+    # track shortest dist for each node
+    dist = {root: 0}
 
-                # mark as visited
-                visited.add(cur)
+    pq = [(0, root)]
 
-                # relax all neighbors
-                for destination in graph_AL[cur]:
-                    if destination not in dist or graph_AL[cur][destination] + dist[cur] < dist[destination]:
-                        dist[destination] = graph_AL[cur][destination] + dist[cur]
-                        pred[destination] = cur
-                        heapq.heappush(pq, (dist[destination], destination))
+    # find shortest paths with Dijkstra's algorithm
+    while len(pq) > 0:
+        d, cur = heapq.heappop(pq)
 
-            # collect shortest paths
-            shortest_paths = {}
-            for vertex in graph_data["vertices"]:
-                vertex = int(vertex)
-
-                shortest_paths[vertex] = []
+        # skip stale entries, for nodes already visited by a
+        # shorter path
+        if d > dist[cur]:
+            continue
 
-                # node is not reachable
-                if vertex not in pred:
-                    continue
+        # relax all neighbors
+        for destination, weight in graph_AL[cur].items():
+            new_dist = d + weight
+            if new_dist < dist.get(destination, math.inf):
+                dist[destination] = new_dist
+                pred[destination] = cur
+                heapq.heappush(pq, (new_dist, destination))
 
-                # backtrace shortest path
-                cur = vertex
-                while cur != None:
-                    shortest_paths[vertex].insert(0, cur)
-                    cur = pred[cur]
-
-            # collect shortest paths with distances
-            for vertex in graph_data["vertices"]:
-                vertex = int(vertex)
-
-                if vertex in dist:
-                    shortest_paths[vertex] = [dist[vertex], shortest_paths[vertex]]
-                else:
-                    shortest_paths[vertex] = [-1, None]
-
-            return {
-                "type": "shortest_paths",
-                "data": {"root": root, "paths": shortest_paths},
-            }
-
-        case "reachable_nodes":
-            # track reachable nodes
-            reachable = set([root])
-
-            # track nodes to visit next
-            queue = [root]
-
-            # perform BFS to find reachable nodes
-            while len(queue) > 0:
-                cur = queue.pop(0)
-
-                # all neighbors are reachable
-                for destination in graph_AL[cur]:
-                    if destination in reachable:
-                        continue
+    # collect shortest paths with distances
+    paths = {}
+    for vertex in vertices:
+        # node is not reachable
+        if vertex not in dist:
+            paths[vertex] = [-1, None]
+            continue
 
-                    reachable.add(destination)
-                    queue.append(destination)
-
-            return {
-                "type": "reachable_nodes",
-                "data": {"root": root, "reachable": list(reachable)},
-            }
+        # backtrace shortest path, then put it in root-first order
+        path = []
+        cur = vertex
+        while cur != None:
+            path.append(cur)
+            cur = pred[cur]
+        path.reverse()
 
-        case "mst":
-            # select an arbitrary vertex as the root
-            root = int(graph_data["vertices"][0])
+        paths[vertex] = [dist[vertex], path]
 
-            # track reachable nodes
-            reachable = set([root])
+    return {
+        "type": "shortest_paths",
+        "data": {"root": root, "paths": paths},
+    }
 
-            # track nodes to visit next
-            queue = [root]
 
-            # perform BFS to find reachable nodes
-            while len(queue) > 0:
-                cur = queue.pop(0)
+def reachable_nodes(vertices, graph_AL, root):
+    # find reachable nodes
+    reachable = reachable_from(graph_AL, root)
 
-                # all neighbors are reachable
-                for destination in graph_AL[cur]:
-                    if destination in reachable:
-                        continue
-                    
-                    reachable.add(destination)
-                    queue.append(destination)
+    return {
+        "type": "reachable_nodes",
+        "data": {"root": root, "reachable": list(reachable)},
+    }
 
-            # disconnect implies no MST
-            for vertex in graph_data["vertices"]:
-                if int(vertex) not in reachable:
-                    return {"type": "mst", "data": False}
-
-            # graph is connected, we can find a MST
-            pq = []
-
-            # start with outgoing edges from root
-            for destination in graph_AL[root]:
-                heapq.heappush(pq, (graph_AL[root][destination], root, destination))
-
-            # track edges in MST
-            mst_edges = []
-
-            # track vertices in MST
-            mst_vertices = [root]
-
-            # find MST with Prim's algorithm
-            while len(pq) > 0:
-                cur = heapq.heappop(pq)
 
-                # edge no longer on fringe
-                if cur[1] in mst_vertices and cur[2] in mst_vertices:
-                    continue
+def mst(vertices, graph_AL, root):
+    # select an arbitrary vertex as the root
+    root = vertices[0]
 
-                # new edge
-                mst_edges.append(cur)
-
-                if cur[1] in mst_vertices:
-                    # second edge is new
-                    mst_vertices.append(cur[2])
-
-                    # add all fringe vertices
-                    for destination in graph_AL[cur[2]]:
-                        if destination not in mst_vertices:
-                            heapq.heappush(pq, (graph_AL[cur[2]][destination], cur[2], destination))
+    pq = []
 
-                else:
-                    # first edge is new
-                    mst_vertices.append(cur[1])
+    # start with outgoing edges from root
+    for destination in graph_AL[root]:
+        heapq.heappush(pq, (graph_AL[root][destination], root, destination))
 
-                    # add all fringe vertices
-                    for destination in graph_AL[cur[1]]:
-                        if destination not in mst_vertices:
-                            heapq.heappush(pq, (graph_AL[cur[1]][destination], cur[1], destination))
+    # track edges in MST
+    mst_edges = []
 
-            # collect edges in [start, end, weight]
-            true_edges = []
-            for edge in mst_edges:
-                true_edges.append([edge[1], edge[2], edge[0]])
+    # track vertices in MST
+    mst_vertices = {root}
 
-            return {"type": "mst", "data": true_edges}
+    # find MST with Prim's algorithm
+    while len(pq) > 0:
+        cur = heapq.heappop(pq)
 
-        case _:
-            raise Exception(f"analysis type {type} is invalid")
+        # edge no longer on fringe
+        if cur[1] in mst_vertices and cur[2] in mst_vertices:
+            continue
+
+        # new edge
+        mst_edges.append(cur)
+
+        if cur[1] in mst_vertices:
+            # second edge is new
+            mst_vertices.add(cur[2])
+
+            # add all fringe vertices
+            for destination in graph_AL[cur[2]]:
+                if destination not in mst_vertices:
+                    heapq.heappush(
+                        pq, (graph_AL[cur[2]][destination], cur[2], destination)
+                    )
+
+        else:
+            # first edge is new
+            mst_vertices.add(cur[1])
+
+            # add all fringe vertices
+            for destination in graph_AL[cur[1]]:
+                if destination not in mst_vertices:
+                    heapq.heappush(
+                        pq, (graph_AL[cur[1]][destination], cur[1], destination)
+                    )
+
+    # disconnect implies no MST: Prim's only reaches the root's
+    # connected component
+    if len(mst_vertices) < len(graph_AL):
+        return {"type": "mst", "data": False}
+
+    # collect edges in [start, end, weight]
+    true_edges = []
+    for edge in mst_edges:
+        true_edges.append([edge[1], edge[2], edge[0]])
+
+    return {"type": "mst", "data": true_edges}
+
+
+#
+# analysis functions by analysis type, each taking the graph's
+# vertices and AL and the root vertex (if any)
+#
+ANALYSES = {
+    "is_connected": is_connected,
+    "has_cycle": has_cycle,
+    "shortest_paths": shortest_paths,
+    "reachable_nodes": reachable_nodes,
+    "mst": mst,
+}
@@ -13,11 +13,25 @@
 #
 
 import json
-import boto3
-import os
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import (
+    get_bucket,
+    get_dbConn,
+    get_lambda_client,
+    dumps_json,
+    loads_json,
+)
+
+
+#
+# graphs are passed to final_perform_analysis in the invoke payload,
+# so it does not download them again, as long as the serialized
+# payload is no larger than this. Larger graphs are passed by data
+# file key, keeping the payload well under the asynchronous
+# invocation limit
+#
+MAX_INLINE_GRAPH_BYTES = 200 * 1024
 
 
 def lambda_handler(event, context):
@@ -26,33 +40,9 @@ def lambda_handler(event, context):
         print("**lambda: final_start_analysis**")
 
         #
-        # set up AWS based on config file
+        # set up S3 access, once per container
         #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
 
         #
         # get graphid from request
@@ -77,16 +67,16 @@ def lambda_handler(event, context):
         print("**Accessing event/pathParameters**")
 
         if "type" in event:
-            type = event["type"]
+            analysis_type = event["type"]
         elif "pathParameters" in event:
             if "type" in event["pathParameters"]:
-                type = event["pathParameters"]["type"]
+                analysis_type = event["pathParameters"]["type"]
             else:
                 raise Exception("endpoint requires type parameter in pathParameters")
         else:
             raise Exception("endpoint requires type parameter in event")
 
-        print("Requested graph type:", type)
+        print("Requested graph type:", analysis_type)
 
         #
         # get root from request
@@ -115,9 +105,7 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # get graph row from database
@@ -145,27 +133,19 @@ def lambda_handler(event, context):
         print("Successfully retrieved row:", row)
 
         #
-        # download file from bucket
+        # read file bytes from bucket, straight into memory
         #
-        local_filename = "/tmp/local_graph_data_file.json"
-
         print("**Downloading graph from S3**")
 
-        bucket.download_file(datafilekey, local_filename)
-
-        #
-        # read bytes from downloaded file
-        #
-        infile = open(local_filename, "rb")
-        bytes = infile.read()
-        infile.close()
+        obj = bucket.Object(datafilekey).get()
+        payload_bytes = obj["Body"].read()
 
-        graph_data = json.loads(bytes.decode())
+        graph_data = loads_json(payload_bytes)
 
         #
         # validate passed parameters
         #
-        validation_results = validate_parameters(type, root, graph_data)
+        validation_results = validate_parameters(analysis_type, root, graph_data)
         if validation_results != None:
             return validation_results
 
@@ -179,16 +159,12 @@ def lambda_handler(event, context):
                     VALUES(%s, %s, %s);
         """
 
-        datatier.perform_action(dbConn, sql, [graphid, "processing", None])
-
         #
-        # grab the jobid that was auto-generated by mysql
+        # the jobid auto-generated by mysql comes back with the INSERT
         #
-        sql = "SELECT LAST_INSERT_ID();"
-
-        row = datatier.retrieve_one_row(dbConn, sql)
-
-        jobid = row[0]
+        jobid = datatier.perform_action_returning_id(
+            dbConn, sql, [graphid, "processing", None]
+        )
 
         print("Created row with jobid:", jobid)
 
@@ -197,13 +173,50 @@ def lambda_handler(event, context):
         #
         print("**Invoking lambda function 'final_perform_analysis'**")
 
-        lambda_client = boto3.client("lambda")
+        lambda_client = get_lambda_client()
 
-        lambda_client.invoke(
-            FunctionName="final_perform_analysis",
-            InvocationType="Event",
-            Payload=json.dumps({"jobid": jobid, "type": type, "root": root}),
-        )
+        event_payload = {
+            "jobid": jobid,
+            "type": analysis_type,
+            "root": root,
+            "datafilekey": datafilekey,
+        }
+
+        #
+        # check the size of the payload as serialized, which can be
+        # larger than the data file (e.g. stdlib json adds spaces)
+        #
+        payload = None
+
+        if len(payload_bytes) <= MAX_INLINE_GRAPH_BYTES:
+            event_payload["graph"] = graph_data
+            payload = dumps_json(event_payload)
+
+            if len(payload) > MAX_INLINE_GRAPH_BYTES:
+                del event_payload["graph"]
+                payload = None
+
+        if payload is None:
+            payload = dumps_json(event_payload)
+
+        try:
+            lambda_client.invoke(
+                FunctionName="final_perform_analysis",
+                InvocationType="Event",
+                Payload=payload,
+            )
+        except Exception:
+            #
+            # analysis never started, so the job won't finish: update
+            # job status: error
+            #
+            print("**Updating job row with status: error**")
+
+            sql = "UPDATE jobs SET status = %s WHERE jobid = %s;"
+
+            datatier.perform_action(dbConn, sql, ["error", jobid])
+
+            raise
 
         #
         # success: 200 OK
@@ -228,8 +241,8 @@ def lambda_handler(event, context):
         }
 
 
-def validate_parameters(type, root, graph_data):
-    if type not in [
+def validate_parameters(analysis_type, root, graph_data):
+    if analysis_type not in [
         "is_connected",
         "has_cycle",
         "shortest_paths",
@@ -240,19 +253,19 @@ def validate_parameters(type, root, graph_data):
             "statusCode": 400,
             "body": json.dumps(
                 {
-                    "message": f"analysis type {type} is invalid",
+                    "message": f"analysis type {analysis_type} is invalid",
                     "jobid": -1,
                 }
             ),
         }
 
-    if type in ["shortest_paths", "reachable_nodes"]:
+    if analysis_type in ["shortest_paths", "reachable_nodes"]:
         if root == None:
             return {
                 "statusCode": 400,
                 "body": json.dumps(
                     {
-                        "message": f"analysis type {type} requires a root node identifier",
+                        "message": f"analysis type {analysis_type} requires a root node identifier",
                         "jobid": -1,
                     }
                 ),
@@ -12,13 +12,11 @@
 #
 
 import json
-import boto3
-import os
 import uuid
 import base64
 import datatier
 
-from configparser import ConfigParser
+from graphapp_common import get_bucket, get_dbConn
 
 
 def lambda_handler(event, context):
@@ -27,33 +25,9 @@ def lambda_handler(event, context):
         print("**lambda: final_upload_graph**")
 
         #
-        # set up AWS based on config file
+        # set up S3 access, once per container
         #
-        config_file = "graphapp-config.ini"
-        os.environ["AWS_SHARED_CREDENTIALS_FILE"] = config_file
-
-        configur = ConfigParser()
-        configur.read(config_file)
-
-        #
-        # configure for S3 access
-        #
-        s3_profile = "s3readwrite"
-        boto3.setup_default_session(profile_name=s3_profile)
-
-        bucketname = configur.get("s3", "bucket_name")
-
-        s3 = boto3.resource("s3")
-        bucket = s3.Bucket(bucketname)
-
-        #
-        # configure for RDS access
-        #
-        rds_endpoint = configur.get("rds", "endpoint")
-        rds_portnum = int(configur.get("rds", "port_number"))
-        rds_username = configur.get("rds", "user_name")
-        rds_pwd = configur.get("rds", "user_pwd")
-        rds_dbname = configur.get("rds", "db_name")
+        bucket = get_bucket()
 
         #
         # get graph file data from request
@@ -106,11 +80,15 @@ def lambda_handler(event, context):
         f.close()
 
         #
-        # generate unique filename in preparation for the S3 upload
+        # generate the graphid here rather than in mysql, so it is
+        # known without reading it back from the database, and use
+        # it for a unique filename in preparation for the S3 upload
         #
         print("**Uploading local file to S3**")
 
-        bucketkey = "graphapp/" + "graph_data_file_" + str(uuid.uuid4()) + ".json"
+        graphid = str(uuid.uuid4())
+
+        bucketkey = "graphapp/" + "graph_data_file_" + graphid + ".json"
 
         print("Using S3 bucketkey:", bucketkey)
 
@@ -128,9 +106,7 @@ def lambda_handler(event, context):
         #
         print("**Opening DB connection**")
 
-        dbConn = datatier.get_dbConn(
-            rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname
-        )
+        dbConn = get_dbConn()
 
         #
         # create new graph row in database
@@ -138,20 +114,11 @@ def lambda_handler(event, context):
         print("**Adding graph row to database**")
 
         sql = """
-        INSERT INTO graphs(datafilekey, visualfilekey)
-                    VALUES(%s, %s);
+        INSERT INTO graphs(graphid, datafilekey, visualfilekey)
+                    VALUES(%s, %s, %s);
         """
 
-        datatier.perform_action(dbConn, sql, [bucketkey, None])
-
-        #
-        # grab the graphid that was auto-generated by mysql
-        #
-        sql = "SELECT LAST_INSERT_ID();"
-
-        row = datatier.retrieve_one_row(dbConn, sql)
-
-        graphid = row[0]
+        datatier.perform_action(dbConn, sql, [graphid, bucketkey, None])
 
         print("Created row with graphid:", graphid)
 